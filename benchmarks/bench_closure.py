@@ -0,0 +1,52 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the path to be able to import the classes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.graph import ancestor_bitsets, closure_numpy, closure_floyd_warshall, topological_order
+
+# Benchmark of the transitive closure engines on random DAGs where every task depends on a
+# few tasks created before it. The bitset engine is timed without the conversion to a dense
+# matrix, which alone needs n² cells and is only done when a caller asks for the matrix.
+
+# Dense engines allocate n² cells so they are only run up to these sizes
+MAX_SIZES = {"floyd-warshall": 200, "numpy": 10000}
+
+def random_dependencies(n, max_deps=3, seed=0):
+    rng = random.Random(seed)
+    # Depending on recent tasks gives long paths, like real pipelines
+    return [rng.sample(range(max(0, i - 50), i), min(i, rng.randint(1, max_deps))) for i in range(n)]
+
+def time_engine(engine, dependencies):
+    start = time.perf_counter()
+    if engine == "bitset":
+        ancestor_bitsets(dependencies, topological_order(dependencies))
+    elif engine == "numpy":
+        closure_numpy(dependencies)
+    else:
+        closure_floyd_warshall(dependencies)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transitive closure engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000, 50000])
+    args = parser.parse_args()
+
+    engines = ["bitset", "numpy", "floyd-warshall"]
+    print(f"{'tasks':>8} " + " ".join(f"{engine:>16}" for engine in engines))
+    for n in args.sizes:
+        dependencies = random_dependencies(n)
+        timings = []
+        for engine in engines:
+            if n > MAX_SIZES.get(engine, n):
+                timings.append(f"{'-':>16}")
+            else:
+                timings.append(f"{time_engine(engine, dependencies):>15.4f}s")
+        print(f"{n:>8} " + " ".join(timings))
+
+if __name__ == "__main__":
+    main()
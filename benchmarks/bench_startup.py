@@ -0,0 +1,55 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+"""
+    Startup time of HyperFlow: time needed by a fresh interpreter to import the core modules,
+    what every CLI invocation and worker process pays before running a single task. The
+    interpreter startup itself is measured separately and subtracted.
+
+        python benchmarks/bench_startup.py --budget 0.3
+
+    Exits with an error if the median import time exceeds the budget or if a visualization
+    or numpy library is imported by the core modules.
+"""
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Only needed by TaskSystem.draw(), and by the dense matrices and plan cache for numpy
+LAZY_MODULES = ["matplotlib", "networkx", "numpy"]
+
+def time_command(code, runs):
+    timings = []
+    for _ in range(runs):
+        # Let the child measure itself so process creation is not counted
+        output = subprocess.run(
+            [sys.executable, "-c", f"import time; start = time.perf_counter(); {code}; print(time.perf_counter() - start)"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        timings.append(float(output.split()[-1]))
+    return statistics.median(timings)
+
+def loaded_lazy_modules():
+    code = f"import sys, src.task, src.task_system; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return eval(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of HyperFlow")
+    parser.add_argument("--budget", type=float, default=0.3, help="Maximum import time in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    import_time = time_command("import src.task, src.task_system", args.runs)
+    print(f"Import time of src.task and src.task_system: {import_time:.4f} sec (budget {args.budget:.4f} sec)")
+
+    loaded = loaded_lazy_modules()
+    if loaded:
+        sys.exit(f"Visualization modules imported at startup: {', '.join(loaded)}")
+    if import_time > args.budget:
+        sys.exit("Import time exceeds the budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import random
+import sys
+import os
+
+# Add the parent directory to the path to be able to import the classes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.task import Task
+
+"""
+    Synthetic task systems for the benchmarks. Every generator returns (tasks, precedence)
+    ready to be given to TaskSystem, always deterministic: tasks sharing a resource are
+    ordered by the precedence graph. Run functions are left empty (no-op tasks) so that
+    benchmarks only measure HyperFlow itself.
+"""
+
+def chain(n, seed=0):
+    # T0 -> T1 -> ... -> Tn-1, each task reads the output of the previous one
+    tasks = [Task(name=f"T{i}", reads=[f"R{i - 1}"] if i else [], writes=[f"R{i}"]) for i in range(n)]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, n)}
+    return tasks, precedence
+
+def fan_out_fan_in(n, seed=0):
+    # A source task, n - 2 independent tasks reading its output and a sink reading all of them
+    width = max(n - 2, 0)
+    tasks = [Task(name="Source", writes=["Input"])]
+    tasks += [Task(name=f"T{i}", reads=["Input"], writes=[f"R{i}"]) for i in range(width)]
+    tasks.append(Task(name="Sink", reads=[f"R{i}" for i in range(width)], writes=["Output"]))
+    precedence = {f"T{i}": ["Source"] for i in range(width)}
+    precedence["Sink"] = [f"T{i}" for i in range(width)]
+    return tasks, precedence
+
+def layered_random(n, seed=0, width=100, max_deps=3):
+    # Layers of width tasks, every task depends on up to max_deps random tasks of the previous layer
+    rng = random.Random(seed)
+    tasks = []
+    precedence = {}
+    previous = []
+    for start in range(0, n, width):
+        layer = [f"T{i}" for i in range(start, min(start + width, n))]
+        for task_name in layer:
+            deps = rng.sample(previous, min(len(previous), rng.randint(1, max_deps))) if previous else []
+            tasks.append(Task(name=task_name, reads=[f"R{dep[1:]}" for dep in deps], writes=[f"R{task_name[1:]}"]))
+            if deps:
+                precedence[task_name] = deps
+        previous = layer
+    return tasks, precedence
+
+def random_overlap(n, seed=0, nb_resources=None, resources_per_task=3):
+    # Tasks read and write random resources of a shared pool, each task depends on the last
+    # task that touched each of its resources so that every conflicting pair is ordered
+    rng = random.Random(seed)
+    if nb_resources is None:
+        nb_resources = max(1, n // 2)
+    last_user = {}
+    tasks = []
+    precedence = {}
+    for i in range(n):
+        resources = rng.sample(range(nb_resources), min(nb_resources, resources_per_task))
+        reads = [f"R{r}" for r in resources[1:]]
+        writes = [f"R{resources[0]}"]
+        deps = sorted({last_user[r] for r in resources if r in last_user})
+        tasks.append(Task(name=f"T{i}", reads=reads, writes=writes))
+        if deps:
+            precedence[f"T{i}"] = deps
+        for r in resources:
+            last_user[r] = f"T{i}"
+    return tasks, precedence
+
+GENERATORS = {
+    "chain": chain,
+    "fan": fan_out_fan_in,
+    "layered": layered_random,
+    "overlap": random_overlap,
+}
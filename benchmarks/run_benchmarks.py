@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# Add the parent directory to the path to be able to import the classes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.generators import GENERATORS
+from src.task_system import TaskSystem
+from src.loader import dump_tasks
+
+"""
+    Scaling benchmark of HyperFlow on synthetic task systems (see generators.py). Results are
+    written as JSON so they can be compared from one release to another:
+
+        python benchmarks/run_benchmarks.py --output results.json
+
+    The closure and matrix measures build dense n×n matrices, they are skipped above the sizes of MAX_SIZES.
+"""
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+MAX_SIZES = {
+    "init": 100000,
+    "closure": 5000,
+    "matrix": 2000,
+    "run": 100000,
+    "runSeq": 100000,
+}
+
+def measure(function, repeat):
+    # Best time of repeat executions
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark(generator, n, measures, repeat):
+    tasks, precedence = GENERATORS[generator](n)
+    results = {}
+
+    if "init" in measures:
+        results["init"] = measure(lambda: TaskSystem(tasks, precedence), repeat)
+    task_system = TaskSystem(tasks, precedence)
+
+    if "closure" in measures:
+        results["closure"] = measure(task_system.createTransitiveClosureMatrix, repeat)
+    if "matrix" in measures:
+        # createMatrix() reuses the compiled plan, time the analysis itself
+        results["matrix"] = measure(lambda: TaskSystem(tasks, precedence).createMatrix(), repeat)
+    if "run" in measures:
+        # The plan is compiled beforehand: only the scheduling overhead of no-op tasks is measured
+        task_system.compile()
+        results["run"] = measure(task_system.run, repeat)
+    if "runSeq" in measures:
+        task_system.compile()
+        results["runSeq"] = measure(task_system.runSeq, repeat)
+
+    task_system.shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HyperFlow on synthetic task systems")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--measures", nargs="+", choices=list(MAX_SIZES), default=list(MAX_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-limits", action="store_true", help="Also run the measures above their maximum size")
+    parser.add_argument("--output", help="JSON file where the results are written (printed if not given)")
+    parser.add_argument("--export-dir", help="Also write every generated task system as JSON Lines (see src/loader.py)")
+    args = parser.parse_args()
+
+    results = []
+    for generator in args.generators:
+        for n in args.sizes:
+            if args.export_dir:
+                os.makedirs(args.export_dir, exist_ok=True)
+                dump_tasks(*GENERATORS[generator](n), os.path.join(args.export_dir, f"{generator}-{n}.jsonl.gz"))
+            measures = [m for m in args.measures if args.no_limits or n <= MAX_SIZES[m]]
+            if not measures:
+                continue
+            for name, seconds in benchmark(generator, n, measures, args.repeat).items():
+                results.append({"generator": generator, "tasks": n, "measure": name, "seconds": seconds})
+                print(f"{generator:>8} {n:>7} {name:>8} {seconds:>10.5f}s", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
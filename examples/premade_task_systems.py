@@ -6,18 +6,44 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.task import Task
 from src.task_system import TaskSystem
+from src.chunked import ChunkedTask, SharedArray
+from functools import partial
+import atexit
 import random
 import time
 import numpy as np
 
 A, B, C, D, E, F = 0, 0, 0, 0, 0, 0
 
-def simple_task_system():
-    def simple_result():
-        # Mimic some computation time
-        time.sleep(0.1)
-        return {"value": random.randint(1, 100)}
+# Task functions are defined at module level (and parametrized with partial) so that they can
+# be pickled and sent to worker processes with task_system.run(backend="process")
+def simple_result():
+    # Mimic some computation time
+    time.sleep(0.1)
+    return {"value": random.randint(1, 100)}
+
+def fibonacci(n):
+    # Mimic some computation time
+    time.sleep(0.01)
+    if n <= 1:
+        return n
+    else:
+        return fibonacci(n-1) + fibonacci(n-2)
+
+def get_matrix(M):
+    return M
+
+def multiply_matrices(A, B):
+    # Mimic some computation time
+    time.sleep(0.5)
+    return np.dot(A, B)
 
+def multiply_rows(out, A, B):
+    # Kernel of a data-parallel task: computes some rows of A @ B in place
+    time.sleep(0.5 * len(out) / 200)
+    np.dot(A, B, out=out)
+
+def simple_task_system():
     tasks = [
         Task(name="T1", reads=["A", "F"], writes=["B"], run=simple_result),
         Task(name="T2", reads=["F"], writes=["D"], run=simple_result),
@@ -38,34 +64,21 @@ def simple_task_system():
     return TaskSystem(tasks, precedence), globals()
 
 def fibonacci_task_system():
-    def fibonacci(n):
-        # Mimic some computation time
-        time.sleep(0.01)
-        if n <= 1:
-            return n
-        else:
-            return fibonacci(n-1) + fibonacci(n-2)
-
-    tasks = [Task(name=f"T{i}", run=lambda i=i: fibonacci(i)) for i in range(8)]
+    tasks = [Task(name=f"T{i}", run=partial(fibonacci, i)) for i in range(8)]
     precedence = {f"T{i}": [f"T{i-1}", f"T{i-2}"] for i in range(2, 8)}
 
     return TaskSystem(tasks, precedence), globals()
 
 def matrix_multiplication_task_system():
-    def multiply_matrices(A, B):
-        # Mimic some computation time
-        time.sleep(0.5)
-        return np.dot(A, B)
-
     A = np.random.rand(2, 2)
     B = np.random.rand(2, 2)
     C = np.random.rand(2, 2)
 
     tasks = [
-        Task(name="T1", writes=["A"], run=lambda: A),
-        Task(name="T2", writes=["B"], run=lambda: B),
-        Task(name="T3", reads=["A", "B"], writes=["C"], run=lambda: multiply_matrices(A, B)),
-        Task(name="T4", reads=["C"], writes=["D"], run=lambda: multiply_matrices(C, A))
+        Task(name="T1", writes=["A"], run=partial(get_matrix, A)),
+        Task(name="T2", writes=["B"], run=partial(get_matrix, B)),
+        Task(name="T3", reads=["A", "B"], writes=["C"], run=partial(multiply_matrices, A, B)),
+        Task(name="T4", reads=["C"], writes=["D"], run=partial(multiply_matrices, C, A))
     ]
     precedence = {
         "T1": [],
@@ -74,4 +87,21 @@ def matrix_multiplication_task_system():
         "T4": ["T3"]
     }
 
-    return TaskSystem(tasks, precedence), globals()
\ No newline at end of file
+    return TaskSystem(tasks, precedence), globals()
+
+def chunked_matrix_multiplication_task_system():
+    # Same products as matrix_multiplication_task_system on bigger matrices, each one split in chunks of rows
+    shared = {name: SharedArray.from_array(np.random.rand(200, 200)) for name in ("A", "B")}
+    shared.update({name: SharedArray((200, 200)) for name in ("C", "D")})
+    for array in shared.values():
+        atexit.register(array.unlink)
+
+    tasks = [
+        ChunkedTask(name="T1", kernel=multiply_rows, output=shared["C"], inputs=[shared["A"], shared["B"]], split=[0], reads=["A", "B"], writes=["C"]),
+        ChunkedTask(name="T2", kernel=multiply_rows, output=shared["D"], inputs=[shared["C"], shared["A"]], split=[0], reads=["C", "A"], writes=["D"]),
+    ]
+    precedence = {
+        "T2": ["T1"]
+    }
+
+    return TaskSystem(tasks, precedence), globals()
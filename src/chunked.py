@@ -0,0 +1,133 @@
+import functools
+import os
+from src.task import Task
+
+"""
+    Data-parallel tasks. A ChunkedTask applies a kernel to an array resource and is split by
+    the task system into nb_chunks subtasks named "name[k]", each one computing a slice of the
+    output along an axis, followed by a join task that keeps the original name. The subtasks
+    get the dependencies of the original task and the tasks depending on it wait for the join,
+    so the rest of the system is not changed.
+
+    Each subtask writes the resources of the task, so it has the same conflicts, and then the
+    same orderings, as the original task with the other tasks of the system. Only the pairs of
+    subtasks of the same task are not analysed (see TaskSystem.conflictingPairs): they write
+    disjoint slices of the output and run in parallel. Arrays are stored in shared memory
+    (SharedArray): chunks are views on the same buffer, with the thread backend as with the
+    process backend, where only the name of the shared memory block is sent to the worker
+    processes.
+"""
+
+class SharedArray:
+    # NumPy array in a multiprocessing.shared_memory block, worker processes attach to it by name
+    def __init__(self, shape, dtype=float, name=None):
+        # Imported here to keep the import of the library fast
+        from multiprocessing import shared_memory
+        import numpy as np
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._owner = name is None
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        shm = shared_memory.SharedMemory(name=name, create=self._owner, size=size if self._owner else 0)
+        # The view is released before the block (see close)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        self._shm = shm
+
+    @classmethod
+    def from_array(cls, array):
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # Pickled as the name of its block, no data is copied
+    def __reduce__(self):
+        return (SharedArray, (self.shape, self.dtype.str, self.name))
+
+    def close(self):
+        # Views of the array must not be used after this
+        self.array = None
+        self._shm.close()
+
+    def unlink(self):
+        # Free the shared memory, only done by the process that created it
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unlink()
+
+def chunk_bounds(length, nb_chunks, k):
+    # Same split as numpy.array_split: chunks sizes differ by at most one
+    return k * length // nb_chunks, (k + 1) * length // nb_chunks
+
+def run_chunk(kernel, output, inputs, split, axis, nb_chunks, k):
+    # Executed by subtask k: kernel(out, *inputs) writes its slice of the output in place
+    start, stop = chunk_bounds(output.shape[axis], nb_chunks, k)
+    index = (slice(None),) * axis + (slice(start, stop),)
+    arrays = [value.array if isinstance(value, SharedArray) else value for value in inputs]
+    kernel(output.array[index], *[array[index] if i in split else array for i, array in enumerate(arrays)])
+
+def join_chunks(output):
+    return output
+
+class ChunkSubtask(Task):
+    # Subtask k of a ChunkedTask, chunk_of is the name of the original task
+    def __init__(self, name, reads, writes, run, cost, chunk_of):
+        super().__init__(name, reads, writes, run, cost)
+        self.chunk_of = chunk_of
+
+class ChunkedTask(Task):
+    def __init__(self, name: str, kernel: callable, output: SharedArray, inputs: list = (), split: list = None, reads: list[str] = [], writes: list[str] = [], nb_chunks: int = None, axis: int = 0, cost: float = None):
+        # Indices of the inputs sliced like the output, the other inputs are given whole to every chunk
+        split = set(range(len(inputs))) if split is None else set(split)
+        # Executed alone (outside of a task system), the kernel is applied to the whole arrays
+        super().__init__(name, reads, writes, functools.partial(run_chunk, kernel, output, list(inputs), split, axis, 1, 0), cost)
+        self.kernel = kernel
+        self.output = output
+        self.inputs = list(inputs)
+        self.split = split
+        self.nb_chunks = min(nb_chunks or os.cpu_count() or 1, max(1, output.shape[axis]))
+        self.axis = axis
+
+    def chunkNames(self):
+        return [f"{self.name}[{k}]" for k in range(self.nb_chunks)]
+
+    def subtasks(self):
+        # Chunk subtasks followed by the join task
+        chunk_cost = None if self.cost is None else self.cost / self.nb_chunks
+        tasks = [
+            ChunkSubtask(
+                name=chunk_name, reads=self.reads, writes=self.writes,
+                run=functools.partial(run_chunk, self.kernel, self.output, self.inputs, self.split, self.axis, self.nb_chunks, k),
+                cost=chunk_cost, chunk_of=self.name,
+            )
+            for k, chunk_name in enumerate(self.chunkNames())
+        ]
+        tasks.append(Task(name=self.name, reads=self.reads, writes=self.writes, run=functools.partial(join_chunks, self.output), cost=0))
+        return tasks
+
+def expand_chunked_tasks(tasks, precedence):
+    # Replace every ChunkedTask by its subtasks, the precedence given by the caller is not modified
+    if not any(isinstance(task, ChunkedTask) for task in tasks):
+        return tasks, precedence
+
+    expanded = []
+    precedence = dict(precedence)
+    for task in tasks:
+        if not isinstance(task, ChunkedTask):
+            expanded.append(task)
+            continue
+        expanded.extend(task.subtasks())
+        deps = list(precedence.get(task.name, []))
+        for chunk_name in task.chunkNames():
+            precedence[chunk_name] = deps
+        precedence[task.name] = task.chunkNames()
+    return expanded, precedence
@@ -0,0 +1,173 @@
+import random
+from dataclasses import dataclass, field
+from src.process_backend import task_store
+from src.resource_store import ResourceStore
+from src.tracing import Tracer
+
+"""
+    Helpers of TaskSystem.detTestRnd(). A trial gives random values to every resource of the
+    system, runs it twice with randomized dispatch orders from the same values and compares
+    the results. By default, trials run one after the other in the calling process and the
+    values of the caller are restored at the end (in O(changed) when the resources are in a
+    ResourceStore). Trials are independent, so with workers > 1 they run in worker processes
+    where fork is available: each worker is a fork of the caller, it gets its own copy of the
+    resources and the caller's values are never modified. The workers of the system are shut
+    down before forking, a process with running threads is not safe to fork.
+"""
+
+@dataclass
+class Divergence:
+    # Random values given to the resources at the beginning of the trial
+    initial_values: dict
+    # Values of the resources after each of the two executions
+    results: tuple
+    # Tasks in the order they started during each of the two executions
+    interleavings: tuple
+
+@dataclass
+class DeterminismReport:
+    trials: int = 0
+    divergences: list = field(default_factory=list)
+
+    @property
+    def deterministic(self):
+        return not self.divergences
+
+    # A report can be used like the boolean returned by previous versions of detTestRnd
+    def __bool__(self):
+        return self.deterministic
+
+def leaf_tasks(task_system):
+    # Tasks of the system, a subsystem run as a unit is replaced by its own tasks
+    from src.task_system import TaskSystem
+    for task in task_system.tasks.values():
+        if isinstance(task, TaskSystem):
+            yield from leaf_tasks(task)
+        else:
+            yield task
+
+def resource_stores(task_system, global_vars=None):
+    # Resource -> dictionaries holding it (the globals of the run functions of the tasks using it by default)
+    stores = {}
+    for task in leaf_tasks(task_system):
+        store = task_store(task, global_vars)
+        for var in task.reads + task.writes:
+            if var not in store:
+                print(f"Warning: Variable '{var}' from task {task.name} does not exist in the globals dictionary.")
+            if all(store is not other for other in stores.setdefault(var, [])):
+                stores[var].append(store)
+    return stores
+
+def install(stores, values):
+    for var, value in values.items():
+        for store in stores[var]:
+            store[var] = value
+
+def collect(stores):
+    return {var: var_stores[0].get(var) for var, var_stores in stores.items()}
+
+def snapshot(stores):
+    # A ResourceStore takes its own snapshot, for other stores the values of the resources
+    # that exist are saved along with the resources that do not exist yet
+    saved, added, snapshots = [], [], {}
+    for var, var_stores in stores.items():
+        for store in var_stores:
+            if isinstance(store, ResourceStore):
+                if id(store) not in snapshots:
+                    snapshots[id(store)] = (store, store.snapshot())
+            elif var in store:
+                saved.append((store, var, store[var]))
+            else:
+                added.append((store, var))
+    return saved, added, list(snapshots.values())
+
+def restore(saved):
+    saved, added, snapshots = saved
+    for store, snapshot in snapshots:
+        store.restore(snapshot)
+    for store, var in added:
+        store.pop(var, None)
+    for store, var, value in saved:
+        store[var] = value
+
+def release(saved):
+    # The values will not be restored again
+    for store, snapshot in saved[2]:
+        store.release(snapshot)
+
+def run_trial(task_system, stores, initial_values):
+    # Two randomized executions from the same values, returns None if they give the same results
+    results = []
+    interleavings = []
+    for _ in range(2):
+        install(stores, initial_values)
+        tracer = Tracer()
+        task_system.run(randomize_names=True, tracer=tracer)
+        results.append(collect(stores))
+        started = sorted((record for record in tracer.records.values() if record.start is not None), key=lambda record: record.start)
+        interleavings.append([record.name for record in started])
+
+    if results[0] == results[1]:
+        return None
+    return Divergence(initial_values, tuple(results), tuple(interleavings))
+
+def run_trials_serial(task_system, stores, trials):
+    report = DeterminismReport()
+    # Values of the caller, restored once all trials are done
+    saved = snapshot(stores)
+    try:
+        for initial_values in trials:
+            report.trials += 1
+            divergence = run_trial(task_system, stores, initial_values)
+            if divergence is not None:
+                report.divergences.append(divergence)
+                break
+    finally:
+        restore(saved)
+        release(saved)
+    return report
+
+# State of a worker process, inherited from the caller when the worker is forked
+_worker = None
+
+def init_worker(task_system, stores):
+    global _worker
+    # The thread pool of the caller does not exist in the forked process, a new one is created
+    task_system._pool = None
+    task_system._owns_pool = True
+    task_system._process_pool = None
+    task_system._owns_process_pool = True
+    # Every worker starts with the same random state, reseed it so trials explore different orders
+    random.seed()
+    _worker = (task_system, stores)
+
+def run_worker_trial(initial_values):
+    task_system, stores = _worker
+    return run_trial(task_system, stores, initial_values)
+
+def run_trials(task_system, trials, global_vars=None, workers=None):
+    import multiprocessing
+    stores = resource_stores(task_system, global_vars)
+    workers = min(workers or 1, len(trials))
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return run_trials_serial(task_system, stores, trials)
+
+    # New workers are created when the system is run again
+    task_system.shutdown()
+
+    # Forked workers inherit the system and its resources, nothing has to be pickled but the values
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    report = DeterminismReport()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"), initializer=init_worker, initargs=(task_system, stores))
+    try:
+        futures = [pool.submit(run_worker_trial, initial_values) for initial_values in trials]
+        for future in as_completed(futures):
+            report.trials += 1
+            divergence = future.result()
+            if divergence is not None:
+                # Stop at the first divergence, the trials not started yet are cancelled
+                report.divergences.append(divergence)
+                break
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    return report
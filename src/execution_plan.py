@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from src.graph import edges_to_matrix, transitive_reduction
+
+"""
+    An ExecutionPlan is the result of the analysis of a task system: the max parallelism
+    graph and everything the schedulers derive from it. Computing it is by far the most
+    expensive part of HyperFlow, so TaskSystem.compile() builds it once and every execution
+    reuses it.
+
+    Tasks are identified by their index in task_names and the graph is stored as adjacency
+    lists, so a plan takes O(V + E) memory. The dense matrix is only built on request.
+
+    The graph is transitively reduced: if T1 -> T2 -> T3, the edge T1 -> T3 is dropped as
+    T3 already waits for T2. A chain of n tasks writing the same resource has n² conflicting
+    pairs but only n - 1 edges left, and every task only waits for its direct predecessors.
+"""
+@dataclass(frozen=True)
+class ExecutionPlan:
+    task_names: tuple[str, ...]
+    # Task name -> task index
+    index: MappingProxyType
+    # Topological order of the precedence graph, used for sequential execution
+    order: tuple[str, ...]
+    # Waves of the max parallelism graph, every task of a level only depends on previous levels
+    levels: tuple[tuple[str, ...], ...]
+    # Adjacency lists of the max parallelism graph (task indices)
+    predecessors: tuple[tuple[int, ...], ...]
+    successors: tuple[tuple[int, ...], ...]
+    predecessor_counts: tuple[int, ...]
+    # Upward rank of every task: its cost plus the longest remaining path to a sink
+    ranks: tuple[float, ...]
+
+    @classmethod
+    def from_task_system(cls, task_system):
+        task_names = tuple(task_system.tasks.keys())
+
+        # Two tasks are linked in the max parallelism graph if they conflict, in the order given by the precedence graph
+        edges = [edge for edge in task_system.getConflicts()[1] if edge is not None]
+        # Kahn's algorithm, in linear time: tasks without pending dependencies are taken in insertion order
+        order = task_system.getOrder()
+        costs = [1 if task.cost is None else task.cost for task in task_system.tasks.values()]
+
+        return cls.from_edges(task_names, edges, order, costs)
+
+    @classmethod
+    def from_edges(cls, task_names, edges, order, costs):
+        n = len(task_names)
+        dependencies = [[] for _ in range(n)]
+        for i, j in edges:
+            dependencies[j].append(i)
+
+        # Keep the minimal set of edges, waiting for the others is useless
+        predecessors = transitive_reduction(dependencies, order)
+        successors = [[] for _ in range(n)]
+        for j, preds in enumerate(predecessors):
+            for i in preds:
+                successors[i].append(j)
+
+        # The level of a task is the length of the longest path leading to it
+        level_of = [0] * n
+        for i in order:
+            level_of[i] = max((level_of[j] + 1 for j in predecessors[i]), default=0)
+
+        # Tasks without cost estimate count for one unit, the rank is then the number of tasks left on the longest path
+        ranks = [0] * n
+        for i in reversed(order):
+            ranks[i] = costs[i] + max((ranks[j] for j in successors[i]), default=0)
+
+        return cls._build(task_names, [task_names[i] for i in order], level_of, predecessors, successors, ranks)
+
+    @classmethod
+    def _build(cls, task_names, order, level_of, predecessors, successors, ranks):
+        levels = [[] for _ in range(max(level_of, default=-1) + 1)]
+        for i, level in enumerate(level_of):
+            levels[level].append(task_names[i])
+
+        return cls(
+            task_names=tuple(task_names),
+            index=MappingProxyType({task_name: i for i, task_name in enumerate(task_names)}),
+            order=tuple(order),
+            levels=tuple(tuple(level) for level in levels),
+            predecessors=tuple(tuple(preds) for preds in predecessors),
+            successors=tuple(tuple(succs) for succs in successors),
+            predecessor_counts=tuple(len(preds) for preds in predecessors),
+            ranks=tuple(ranks),
+        )
+
+    def edges(self):
+        for i, succs in enumerate(self.successors):
+            for j in succs:
+                yield i, j
+
+    def dense_matrix(self):
+        # matrix[i, j] == 1 if task i must run right before task j in the max parallelism graph
+        return edges_to_matrix(self.edges(), len(self.task_names))
+
+    """
+        Plans can be saved as a set of NumPy arrays (see src/plan_cache.py). Adjacency lists
+        are stored in CSR format: the predecessors of task i are
+        predecessor_indices[predecessor_offsets[i]:predecessor_offsets[i + 1]].
+    """
+    def to_arrays(self):
+        import numpy as np
+        level_of = [0] * len(self.task_names)
+        for level, task_names in enumerate(self.levels):
+            for task_name in task_names:
+                level_of[self.index[task_name]] = level
+
+        return {
+            "task_names": np.array(self.task_names, dtype=str),
+            "order": np.array([self.index[task_name] for task_name in self.order], dtype=np.int64),
+            "level_of": np.array(level_of, dtype=np.int64),
+            "predecessor_offsets": np.cumsum([0] + list(self.predecessor_counts), dtype=np.int64),
+            "predecessor_indices": np.array([j for preds in self.predecessors for j in preds], dtype=np.int64),
+            "ranks": np.array(self.ranks, dtype=float),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        task_names = [str(task_name) for task_name in arrays["task_names"]]
+        n = len(task_names)
+
+        offsets = arrays["predecessor_offsets"].tolist()
+        indices = arrays["predecessor_indices"].tolist()
+        predecessors = [indices[offsets[i]:offsets[i + 1]] for i in range(n)]
+        successors = [[] for _ in range(n)]
+        for i, preds in enumerate(predecessors):
+            for j in preds:
+                successors[j].append(i)
+
+        order = [task_names[i] for i in arrays["order"].tolist()]
+        return cls._build(task_names, order, arrays["level_of"].tolist(), predecessors, successors, arrays["ranks"].tolist())
+
+    def representation(self):
+        # Textual representation of the max parallelism execution, one line per level
+        execution_representation = "start\n"
+        for level in self.levels:
+            # Add parallel block if multiple tasks are runnable
+            if len(level) > 1:
+                execution_representation += f"\tparbegin {' '.join(level)} parend;\n"
+            else:
+                execution_representation += f"\t{' '.join(level)}\n"
+        return execution_representation + "end"
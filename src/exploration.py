@@ -0,0 +1,181 @@
+import dis
+import functools
+import heapq
+import random
+import types
+from src.determinism import DeterminismReport, Divergence, collect, install, release, resource_stores, restore, snapshot
+from src.graph import orient_pairs, topological_order
+from src.process_backend import callable_globals, task_store
+
+"""
+    Systematic exploration of the interleavings of a task system, used by
+    TaskSystem.detTestExplore(). Instead of running the tasks on threads and hoping that a
+    race shows up, the system is executed sequentially in chosen orders (linearizations of
+    the max parallelism graph) from the same initial values, and the results are compared.
+
+    Only the relative order of racy pairs matters: two tasks that are not ordered by the plan
+    and whose footprints conflict. The footprint of a task is its declared r/w domains plus
+    the globals its run function really loads and stores, found in its bytecode, so
+    undeclared resources are taken into account. Two linearizations giving the same order to
+    every racy pair give the same results, only one of them is executed.
+
+    - Small systems: every consistent orientation of the racy pairs is executed once.
+    - Large systems: linearizations are sampled, each one forcing a random racy pair in a
+      random direction and ordering the other tasks randomly.
+"""
+
+def code_globals(code):
+    # Names of the globals loaded and stored by a code object and the functions defined in it
+    loads, stores = set(), set()
+    for instruction in dis.get_instructions(code):
+        if instruction.opname == "LOAD_GLOBAL":
+            loads.add(instruction.argval)
+        elif instruction.opname in ("STORE_GLOBAL", "DELETE_GLOBAL"):
+            stores.add(instruction.argval)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            nested_loads, nested_stores = code_globals(const)
+            loads |= nested_loads
+            stores |= nested_stores
+    return loads, stores
+
+def task_footprint(task, store):
+    # Resources read and written by a task, declared or found in the bytecode of its run function
+    reads, writes = set(task.reads), set(task.writes)
+    function = task.run
+    while isinstance(function, functools.partial):
+        function = function.func
+    function = getattr(function, "__func__", function)
+    code = getattr(function, "__code__", None)
+    if code is not None and callable_globals(task.run) is store:
+        loads, stores = code_globals(code)
+        # Only globals holding data are resources, not the modules, functions and classes used by the task
+        reads |= {name for name in loads if name in store and not callable(store[name]) and not isinstance(store[name], types.ModuleType)}
+        writes |= stores
+    return reads, writes
+
+def racy_pairs(plan, footprints):
+    # Pairs of tasks that are not ordered by the plan and whose footprints conflict
+    readers, writers = {}, {}
+    for i, (reads, writes) in enumerate(footprints):
+        for resource in reads:
+            readers.setdefault(resource, []).append(i)
+        for resource in writes:
+            writers.setdefault(resource, []).append(i)
+
+    pairs = set()
+    for resource, resource_writers in writers.items():
+        for k, i in enumerate(resource_writers):
+            for j in resource_writers[k + 1:] + readers.get(resource, []):
+                if i != j:
+                    pairs.add((min(i, j), max(i, j)))
+    pairs = sorted(pairs)
+    oriented = orient_pairs([list(preds) for preds in plan.predecessors], pairs)
+    return [pair for pair, edge in zip(pairs, oriented) if edge is None]
+
+def enumerate_linearizations(plan, pairs):
+    # One linearization for each orientation of the racy pairs that does not create a cycle
+    dependencies = [list(preds) for preds in plan.predecessors]
+
+    def visit(k):
+        if k == len(pairs):
+            yield topological_order(dependencies)
+            return
+        a, b = pairs[k]
+        for first, last in ((a, b), (b, a)):
+            dependencies[last].append(first)
+            try:
+                topological_order(dependencies)
+            except ValueError:
+                dependencies[last].pop()
+                continue
+            yield from visit(k + 1)
+            dependencies[last].pop()
+
+    yield from visit(0)
+
+def sample_linearization(plan, pairs, rng):
+    # Random list scheduling where a random racy pair is forced in a random direction
+    n = len(plan.task_names)
+    priorities = [rng.random() for _ in range(n)]
+    first, last = rng.choice(pairs)
+    if rng.random() < 0.5:
+        first, last = last, first
+    # The first task runs as soon as possible and the last one as late as possible
+    priorities[first], priorities[last] = -1.0, 2.0
+
+    remaining = list(plan.predecessor_counts)
+    ready = [(priorities[i], i) for i in range(n) if remaining[i] == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append(i)
+        for succ in plan.successors[i]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                heapq.heappush(ready, (priorities[succ], succ))
+    return order
+
+def signature(order, pairs):
+    # Orientation of every racy pair, linearizations with the same signature give the same results
+    position = {i: p for p, i in enumerate(order)}
+    return tuple(position[a] < position[b] for a, b in pairs)
+
+def explore(task_system, global_vars=None, max_executions=100, seed=None):
+    plan = task_system.compile()
+    tasks = [task_system.tasks[task_name] for task_name in plan.task_names]
+    rng = random.Random(seed)
+
+    # Declared resources get random values, undeclared ones found in the bytecode keep their value
+    stores = resource_stores(task_system, global_vars)
+    footprints = []
+    for task in tasks:
+        store = task_store(task, global_vars)
+        reads, writes = task_footprint(task, store)
+        for var in (reads | writes) - set(stores):
+            stores[var] = [store]
+        footprints.append((reads, writes))
+    declared = sorted({var for task in tasks for var in task.reads + task.writes})
+    initial_values = {var: rng.randint(0, 99) for var in declared}
+
+    pairs = racy_pairs(plan, footprints)
+    if not pairs:
+        # Every linearization gives the same results
+        linearizations = iter([[plan.index[task_name] for task_name in plan.order]])
+    elif 2 ** len(pairs) <= max_executions:
+        linearizations = enumerate_linearizations(plan, pairs)
+    else:
+        linearizations = (sample_linearization(plan, pairs, rng) for _ in range(10 * max_executions))
+
+    report = DeterminismReport()
+    saved = snapshot(stores)
+    start_values = collect(stores)
+    reference = None
+    explored = set()
+    try:
+        for order in linearizations:
+            if report.trials >= max_executions:
+                break
+            key = signature(order, pairs)
+            if key in explored:
+                continue
+            explored.add(key)
+
+            restore(saved)
+            install(stores, initial_values)
+            for i in order:
+                tasks[i].execute()
+            report.trials += 1
+
+            results = collect(stores)
+            interleaving = [plan.task_names[i] for i in order]
+            if reference is None:
+                reference = (results, interleaving)
+            elif results != reference[0]:
+                report.divergences.append(Divergence({**start_values, **initial_values}, (reference[0], results), (reference[1], interleaving)))
+                break
+    finally:
+        restore(saved)
+        release(saved)
+    return report
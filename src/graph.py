@@ -0,0 +1,226 @@
+"""
+    Graph algorithms used to analyse task systems. Tasks are identified by their index
+    and a graph is given as a list of dependencies: dependencies[i] contains the indices
+    of the tasks that must run before task i.
+
+    Analysis and execution only use these adjacency lists. Dense n×n matrices (and NumPy)
+    are only needed by the closure engines, when a caller explicitly asks for a matrix.
+"""
+
+def topological_order(dependencies, partial=False):
+    # Kahn's algorithm, tasks without pending dependencies are taken in index order. With
+    # partial=True, a graph with a cycle gives the tasks ordered before the algorithm got stuck
+    n = len(dependencies)
+    remaining = [len(deps) for deps in dependencies]
+    successors = [[] for _ in range(n)]
+    for i, deps in enumerate(dependencies):
+        for dep in deps:
+            successors[dep].append(i)
+
+    order = [i for i in range(n) if remaining[i] == 0]
+    for i in order:
+        for succ in successors[i]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                order.append(succ)
+
+    if len(order) != n and not partial:
+        raise ValueError("The graph contains a cycle")
+    return order
+
+def find_cycle(dependencies):
+    # A cycle of the graph as task indices in execution order, None if the graph is acyclic
+    n = len(dependencies)
+    order = topological_order(dependencies, partial=True)
+    if len(order) == n:
+        return None
+
+    # Every task left by Kahn's algorithm has a dependency that is also left, following
+    # them from any of these tasks ends up in a cycle
+    done = [False] * n
+    for i in order:
+        done[i] = True
+    position = {}
+    path = []
+    i = done.index(False)
+    while i not in position:
+        position[i] = len(path)
+        path.append(i)
+        i = next(dep for dep in dependencies[i] if not done[dep])
+    # The path follows dependencies, the cycle is given from its first task in execution order
+    cycle = path[position[i]:][::-1]
+    start = cycle.index(min(cycle))
+    return cycle[start:] + cycle[:start]
+
+"""
+    A bitset stores the ancestors of a task as a Python int: bit j is set if task j must
+    run before the task. Visiting tasks in topological order, the ancestors of a task are
+    the union of the ancestors of its dependencies, so the whole closure costs O(E) big
+    integer ORs of n bits instead of the n³ steps of Floyd-Warshall.
+"""
+def ancestor_bitsets(dependencies, order=None):
+    if order is None:
+        order = topological_order(dependencies)
+
+    ancestors = [0] * len(dependencies)
+    for i in order:
+        bits = 0
+        for dep in dependencies[i]:
+            bits |= ancestors[dep] | (1 << dep)
+        ancestors[i] = bits
+    return ancestors
+
+"""
+    Orient pairs of tasks along the precedence graph without computing the whole closure:
+    returns, for every pair (a, b), the pair in execution order if one of the tasks is an
+    ancestor of the other and None otherwise.
+
+    Only the earlier task of each pair (in topological order) needs a bit, and the ancestors
+    of a task are dropped as soon as all its successors have been visited. The memory used is
+    then proportional to the width of the graph times the number of queried tasks instead of
+    n² bits, and a chain of any length only keeps a couple of bitsets alive.
+"""
+def orient_pairs(dependencies, pairs, order=None):
+    if not pairs:
+        return []
+    if order is None:
+        order = topological_order(dependencies)
+    n = len(dependencies)
+    position = [0] * n
+    for p, i in enumerate(order):
+        position[i] = p
+
+    # Queries are answered when the later task of the pair is visited
+    queries = {}
+    bit_of = {}
+    for k, (a, b) in enumerate(pairs):
+        first, last = (a, b) if position[a] < position[b] else (b, a)
+        queries.setdefault(last, []).append((k, first))
+        if first not in bit_of:
+            bit_of[first] = 1 << len(bit_of)
+
+    nb_successors = [0] * n
+    for deps in dependencies:
+        for dep in deps:
+            nb_successors[dep] += 1
+
+    oriented = [None] * len(pairs)
+    ancestors = {}
+    for i in order:
+        bits = 0
+        for dep in dependencies[i]:
+            bits |= ancestors[dep] | bit_of.get(dep, 0)
+            # Nobody else needs the ancestors of dep once all its successors are visited
+            nb_successors[dep] -= 1
+            if nb_successors[dep] == 0:
+                del ancestors[dep]
+        for k, first in queries.get(i, ()):
+            if bits & bit_of[first]:
+                oriented[k] = (first, i)
+        if nb_successors[i]:
+            ancestors[i] = bits
+
+    return oriented
+
+"""
+    Transitive reduction of a DAG: an edge j -> i is dropped when j is already an ancestor of
+    another dependency of i, the remaining edges are the minimal set giving the same ordering.
+    Dependencies of a task are visited from the latest to the earliest in topological order,
+    so a dependency is redundant exactly when it is among the ancestors accumulated so far.
+    As in orient_pairs, ancestors are dropped once all the successors of a task are visited.
+"""
+def transitive_reduction(dependencies, order=None):
+    if order is None:
+        order = topological_order(dependencies)
+    n = len(dependencies)
+    position = [0] * n
+    for p, i in enumerate(order):
+        position[i] = p
+
+    nb_successors = [0] * n
+    for deps in dependencies:
+        for dep in set(deps):
+            nb_successors[dep] += 1
+
+    reduced = [[] for _ in range(n)]
+    ancestors = {}
+    for i in order:
+        deps = dependencies[i]
+        if not deps and not nb_successors[i]:
+            continue
+        bits = 0
+        for dep in sorted(set(deps), key=position.__getitem__, reverse=True):
+            if not bits >> dep & 1:
+                reduced[i].append(dep)
+                bits |= ancestors[dep] | (1 << dep)
+        for dep in set(deps):
+            nb_successors[dep] -= 1
+            if nb_successors[dep] == 0:
+                del ancestors[dep]
+        if nb_successors[i]:
+            ancestors[i] = bits
+        reduced[i].sort()
+
+    return reduced
+
+def edges_to_matrix(edges, n):
+    # matrix[i, j] == 1 for every edge i -> j
+    import numpy as np
+    matrix = np.zeros((n, n), dtype=int)
+    for i, j in edges:
+        matrix[i, j] = 1
+    return matrix
+
+def bitset_to_indices(bits):
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
+
+def bitsets_to_matrix(bitsets, n):
+    # closure[j, i] == 1 if bit j is set in bitsets[i]
+    import numpy as np
+    nb_bytes = (n + 7) // 8
+    columns = np.zeros((n, n), dtype=np.uint8)
+    for i, bits in enumerate(bitsets):
+        if bits:
+            columns[i] = np.unpackbits(np.frombuffer(bits.to_bytes(nb_bytes, "little"), dtype=np.uint8), count=n, bitorder="little")
+    return columns.T.astype(int)
+
+def closure_bitset(dependencies):
+    return bitsets_to_matrix(ancestor_bitsets(dependencies), len(dependencies))
+
+def closure_numpy(dependencies):
+    # Same idea as the bitsets but each row of ancestors is a NumPy bool array
+    import numpy as np
+    n = len(dependencies)
+    ancestors = np.zeros((n, n), dtype=bool)
+    for i in topological_order(dependencies):
+        for dep in dependencies[i]:
+            ancestors[i] |= ancestors[dep]
+            ancestors[i, dep] = True
+    return ancestors.T.astype(int)
+
+def closure_floyd_warshall(dependencies):
+    # Original implementation, kept as a reference for the other engines
+    import numpy as np
+    n = len(dependencies)
+    transitive_closure = np.zeros((n, n), dtype=int)
+    for i, deps in enumerate(dependencies):
+        for j in deps:
+            transitive_closure[j, i] = 1
+
+    for k in range(n):
+        for i in range(n):
+            for j in range(n):
+                transitive_closure[i, j] = transitive_closure[i, j] or (transitive_closure[i, k] and transitive_closure[k, j])
+
+    return transitive_closure
+
+CLOSURE_ENGINES = {
+    "bitset": closure_bitset,
+    "numpy": closure_numpy,
+    "floyd-warshall": closure_floyd_warshall,
+}
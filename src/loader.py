@@ -0,0 +1,141 @@
+import functools
+import gzip
+import importlib
+import json
+import sys
+from src.task import Task
+
+"""
+    Task systems stored as JSON Lines, one task per line:
+
+        {"name": "T2", "reads": ["X"], "writes": ["Y"], "run": "package.module:function", "deps": ["T1"]}
+
+    Only "name" is required. "run" references a module-level callable, "args" gives the
+    arguments of a functools.partial of it and "cost" the cost estimate of the task. Files
+    ending with .gz are compressed.
+
+    The file is read line by line, so only the tasks are kept in memory and not the whole
+    document. Names and resources are interned: the same resource used by a million tasks is
+    stored once. Each line is validated as soon as it is read and errors give its line number;
+    dependencies on tasks defined further in the file are allowed and checked at the end.
+"""
+
+def open_spec(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+def resolve_callable(reference):
+    # "package.module:qualname" -> the object it references
+    module_name, _, qualname = reference.partition(":")
+    if not module_name or not qualname:
+        raise ValueError(f"Invalid callable reference '{reference}', expected 'module:qualname'")
+    value = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        value = getattr(value, attribute)
+    return value
+
+def callable_reference(function):
+    # Inverse of resolve_callable, only module-level callables can be referenced
+    module_name = getattr(function, "__module__", None)
+    qualname = getattr(function, "__qualname__", None)
+    if not module_name or not qualname or "<locals>" in qualname or "<lambda>" in qualname:
+        raise ValueError(f"Callable {function!r} can not be exported, it must be defined at module level")
+    return f"{module_name}:{qualname}"
+
+def names_list(value, field, line_number):
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError(f"Line {line_number}: '{field}' must be a list of strings")
+    return [sys.intern(name) for name in value]
+
+def load_tasks(path):
+    tasks = []
+    precedence = {}
+    names = set()
+    # Dependencies on tasks that have not been read yet: name -> first line using it
+    pending = {}
+    callables = {}
+
+    with open_spec(path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: invalid JSON ({e.msg})") from None
+            if not isinstance(spec, dict):
+                raise ValueError(f"Line {line_number}: a task must be a JSON object")
+
+            name = spec.get("name")
+            if not isinstance(name, str) or not name:
+                raise ValueError(f"Line {line_number}: Task name cannot be empty")
+            name = sys.intern(name)
+            if name in names:
+                raise ValueError(f"Line {line_number}: Duplicate task name '{name}'")
+            names.add(name)
+            pending.pop(name, None)
+
+            run = None
+            if spec.get("run") is not None:
+                reference = spec["run"]
+                if not isinstance(reference, str):
+                    raise ValueError(f"Line {line_number}: 'run' must be a string")
+                if reference not in callables:
+                    try:
+                        callables[reference] = resolve_callable(reference)
+                    except (ImportError, AttributeError, ValueError) as e:
+                        raise ValueError(f"Line {line_number}: {e}") from None
+                run = callables[reference]
+                if spec.get("args"):
+                    run = functools.partial(run, *spec["args"])
+
+            tasks.append(Task(
+                name=name,
+                reads=names_list(spec.get("reads", []), "reads", line_number),
+                writes=names_list(spec.get("writes", []), "writes", line_number),
+                run=run,
+                cost=spec.get("cost"),
+            ))
+
+            deps = names_list(spec.get("deps", []), "deps", line_number)
+            if deps:
+                precedence[name] = deps
+                for dep in deps:
+                    if dep not in names:
+                        pending.setdefault(dep, line_number)
+
+    if pending:
+        dep, line_number = next(iter(pending.items()))
+        raise ValueError(f"Line {line_number}: Missing dependency detected: '{dep}' does not exist.")
+
+    return tasks, precedence
+
+def load_task_system(path, **kwargs):
+    # Other arguments are given to the TaskSystem constructor
+    from src.task_system import TaskSystem
+    tasks, precedence = load_tasks(path)
+    return TaskSystem(tasks, precedence, **kwargs)
+
+def dump_tasks(tasks, precedence, path):
+    with open_spec(path, "w") as f:
+        for task in tasks:
+            spec = {"name": task.name, "reads": list(task.reads), "writes": list(task.writes)}
+            if task.run is not None:
+                run = task.run
+                if isinstance(run, functools.partial):
+                    if run.keywords:
+                        raise ValueError(f"Task '{task.name}' can not be exported, keyword arguments of partial are not supported")
+                    spec["args"] = list(run.args)
+                    run = run.func
+                spec["run"] = callable_reference(run)
+            deps = precedence.get(task.name)
+            if deps:
+                spec["deps"] = list(deps)
+            if task.cost is not None:
+                spec["cost"] = task.cost
+            f.write(json.dumps(spec, separators=(",", ":")))
+            f.write("\n")
+
+def dump_task_system(task_system, path):
+    dump_tasks(task_system.tasks.values(), task_system.precedence, path)
@@ -0,0 +1,58 @@
+import threading
+
+"""
+    Shared/exclusive lock protecting a resource during run(). Any number of tasks that only
+    read the resource can hold it at the same time, a task writing it needs it alone. This
+    follows the Bernstein condition: two reads of the same resource never conflict.
+
+    Waiting writers have priority over new readers so that a stream of readers can not
+    starve them.
+"""
+class ReadWriteLock:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self, blocking=True):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                if not blocking:
+                    return False
+                self._condition.wait()
+            self._readers += 1
+            return True
+
+    def release_read(self):
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    def acquire_write(self, blocking=True):
+        with self._condition:
+            if not blocking and (self._writer or self._readers):
+                return False
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+            return True
+
+    def release_write(self):
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    def acquire(self, write=False, blocking=True):
+        if write:
+            return self.acquire_write(blocking)
+        return self.acquire_read(blocking)
+
+    def release(self, write=False):
+        if write:
+            self.release_write()
+        else:
+            self.release_read()
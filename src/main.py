@@ -7,7 +7,7 @@ import textwrap
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from examples.graph_example import generate_graph
-from examples.premade_task_systems import simple_task_system, fibonacci_task_system, matrix_multiplication_task_system
+from examples.premade_task_systems import simple_task_system, fibonacci_task_system, matrix_multiplication_task_system, chunked_matrix_multiplication_task_system
 
 class CustomArgumentParser(argparse.ArgumentParser):
     def print_welcome(self):
@@ -48,6 +48,7 @@ class CustomArgumentParser(argparse.ArgumentParser):
         1. Simple task system
         2. Fibonacci task system
         3. Matrix multiplication task system
+        4. Data-parallel matrix multiplication task system
         """)
         print(test_message)
 
@@ -64,6 +65,9 @@ class CustomArgumentParser(argparse.ArgumentParser):
                 elif choice == '3':
                     print("Matrix multiplication task system")
                     task_system, globals = matrix_multiplication_task_system()
+                elif choice == '4':
+                    print("Data-parallel matrix multiplication task system")
+                    task_system, globals = chunked_matrix_multiplication_task_system()
                 elif choice == 'exit' or choice == 'quit':
                     sys.exit()
                 else:
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+from src.execution_plan import ExecutionPlan
+
+"""
+    On-disk cache of execution plans. Building the plan of a large task system (validation,
+    max parallelism graph, levels) can take much longer than reading it back, so
+    a TaskSystem created with a cache_dir stores its plan in a compressed .npz file named after
+    a hash of everything the analysis depends on: task names, kinds, r/w domains, costs,
+    precedence and the groups of tasks whose pairs are not analysed (chunks of the same
+    ChunkedTask, tasks of the same inlined subsystem). Creating the same system again only reads the file, any change to one of
+    these gives a new hash and a new analysis.
+"""
+
+# Bump when the content of the cache files changes so old files are ignored
+CACHE_VERSION = 4
+
+def system_hash(task_system):
+    description = {
+        "version": CACHE_VERSION,
+        "tasks": [[task.name, type(task).__name__, getattr(task, "chunk_of", None), list(task.reads), list(task.writes), task.cost] for task in task_system.tasks.values()],
+        "precedence": {task_name: list(task_system.getDependencies(task_name)) for task_name in task_system.tasks.keys()},
+        "inlined": [indices for _, indices in task_system._inlined],
+    }
+    return hashlib.sha256(json.dumps(description, separators=(",", ":")).encode()).hexdigest()
+
+def cache_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+def load_plan(cache_dir, key):
+    # Returns None when the plan is not in the cache or the file can not be read
+    path = cache_path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    # NumPy is only imported when a cache is used, see benchmarks/bench_startup.py
+    import numpy as np
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            return ExecutionPlan.from_arrays(arrays)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def save_plan(cache_dir, key, plan):
+    import numpy as np
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, key)
+    # Write to a temporary file first so another process never reads a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **plan.to_arrays())
+    os.replace(tmp_path, path)
@@ -0,0 +1,42 @@
+import functools
+
+"""
+    Helpers of the "process" backend of TaskSystem.run(). Threads share the GIL so CPU-bound
+    tasks get no real speedup from them; this backend ships the run function of a task to a
+    worker process instead. Tasks communicate through module globals (see the examples), so
+    the values of the resources of the task are sent along with it and the values of its
+    write domain are sent back to the main process once it is done.
+"""
+
+def callable_globals(function):
+    # Globals dictionary in which a task function reads and writes its resources
+    while isinstance(function, functools.partial):
+        function = function.func
+    function = getattr(function, "__func__", function)
+    return getattr(function, "__globals__", None)
+
+def task_store(task, global_vars=None):
+    # Dictionary holding the resources of a task: global_vars if given, else the globals of its run function
+    if global_vars is not None:
+        return global_vars
+    # Imported here, src.task_system imports this module
+    from src.task_system import TaskSystem
+    if isinstance(task, TaskSystem):
+        # A subsystem has no store, each of its tasks has its own
+        return {}
+    return (callable_globals(task.run) if task.run else None) or {}
+
+def resource_values(task, store):
+    # Values of the r/w domains of a task that exist in the store
+    return {resource: store[resource] for resource in set(task.reads + task.writes) if resource in store}
+
+def run_in_process(run, writes, values):
+    # Executed in the worker process: install the resources, run the task and send back what it wrote
+    namespace = callable_globals(run)
+    if namespace is not None:
+        namespace.update(values)
+    result = run()
+    written = {}
+    if namespace is not None:
+        written = {resource: namespace[resource] for resource in writes if resource in namespace}
+    return result, written
@@ -0,0 +1,118 @@
+import hashlib
+import itertools
+import pickle
+import sys
+import threading
+from collections.abc import MutableMapping
+
+"""
+    First-class store of the resources of a task system, to be used instead of a globals
+    dictionary (global_vars of run, runSeq, detTestRnd...). It is a regular mutable mapping
+    with a few additions:
+
+    - Versions: every write gives the resource a new version number, unique in the store, so
+      "did this resource change" is a comparison of two integers.
+    - Snapshots: snapshot() is O(1) and restore() undoes the writes made since the snapshot
+      in O(changed) thanks to an undo log, kept only while a snapshot is alive (see release).
+    - Zero-copy arrays: NumPy arrays are stored by reference and read as read-only views, so
+      tasks can not modify them in place and must write a new array. Values referenced by the
+      undo log are then never modified and nothing has to be copied.
+    - Digests: a content digest of each resource, computed once per version (array buffers
+      are hashed directly), used by ResultCache to fingerprint the inputs of a task.
+"""
+
+class ResourceStore(MutableMapping):
+    def __init__(self, values=None):
+        self._values = {}
+        self._versions = {}
+        self._digests = {}
+        # (resource, previous value, previous version), previous version is None for a new resource
+        self._log = []
+        self._snapshots = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        if values is not None:
+            self.update(values)
+
+    def __getitem__(self, resource):
+        value = self._values[resource]
+        numpy = sys.modules.get("numpy")
+        if numpy is not None and isinstance(value, numpy.ndarray) and value.flags.writeable:
+            value = value.view()
+            value.flags.writeable = False
+        return value
+
+    def __setitem__(self, resource, value):
+        with self._lock:
+            if self._snapshots:
+                self._log.append((resource, self._values.get(resource), self._versions.get(resource)))
+            self._values[resource] = value
+            self._versions[resource] = next(self._counter)
+
+    def __delitem__(self, resource):
+        with self._lock:
+            if self._snapshots:
+                self._log.append((resource, self._values[resource], self._versions[resource]))
+            del self._values[resource]
+            del self._versions[resource]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"ResourceStore({self._values!r})"
+
+    def version(self, resource):
+        # None if the resource is not in the store
+        return self._versions.get(resource)
+
+    def snapshot(self):
+        # Restoring a snapshot invalidates the snapshots taken after it
+        with self._lock:
+            self._snapshots += 1
+            return len(self._log)
+
+    def restore(self, snapshot):
+        # Undo the writes made since the snapshot, the most recent first
+        with self._lock:
+            while len(self._log) > snapshot:
+                resource, value, version = self._log.pop()
+                if version is None:
+                    self._values.pop(resource, None)
+                    self._versions.pop(resource, None)
+                else:
+                    self._values[resource] = value
+                    self._versions[resource] = version
+
+    def release(self, snapshot):
+        # The snapshot will not be restored anymore, the undo log is dropped with the last one
+        with self._lock:
+            self._snapshots -= 1
+            if not self._snapshots:
+                self._log.clear()
+
+    def digest(self, resource):
+        # Digest of the value of a resource, None if it can not be hashed
+        version = self._versions.get(resource)
+        cached = self._digests.get(resource)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        value = self._values.get(resource)
+        numpy = sys.modules.get("numpy")
+        try:
+            if numpy is not None and isinstance(value, numpy.ndarray) and value.dtype != object:
+                # Hash the buffer itself instead of a pickled copy
+                h = hashlib.blake2b(digest_size=16)
+                h.update(repr((value.dtype.str, value.shape)).encode())
+                h.update(numpy.ascontiguousarray(value).data)
+                digest = h.digest()
+            else:
+                digest = hashlib.blake2b(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+        except (pickle.PicklingError, TypeError, AttributeError):
+            digest = None
+        self._digests[resource] = (version, digest)
+        return digest
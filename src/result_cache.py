@@ -0,0 +1,116 @@
+import copy
+import hashlib
+import itertools
+import pickle
+import sys
+import threading
+import types
+import weakref
+from collections import OrderedDict
+from src.loader import callable_reference
+from src.resource_store import ResourceStore
+
+"""
+    Opt-in memoization of task results. A task is identified by its name, its run function and
+    a fingerprint of the values of its read domain in the resource store (the globals
+    dictionary the task functions use). When a task is executed again with the same input
+    values, its run function is skipped: the values it wrote and its result are restored from
+    the cache instead. A run function defined at module level is identified by its reference
+    ("module:qualname"), so one cache can be shared by several systems; for other run
+    functions (lambdas, closures, partials, bound methods) the task object is the identity.
+
+    Only the read domain is fingerprinted, so a task must declare everything it reads (and its
+    run function must not have side effects outside of its write domain) to be memoized. The
+    written values and the result are copied when they are cached and when they are restored,
+    so a task modifying them in place later does not modify the cache; read-only NumPy arrays
+    (the arrays of a ResourceStore) can not be modified and are kept by reference. With a
+    ResourceStore, the digests of the values are computed once per version instead of pickling
+    them for every fingerprint. The cache keeps at most max_size entries and evicts the least
+    recently used one.
+"""
+class ResultCache:
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Identity of the tasks whose run function has no reference, dropped with the task
+        self._identities = weakref.WeakKeyDictionary()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def identity(self, task):
+        if isinstance(task.run, types.FunctionType):
+            try:
+                return callable_reference(task.run)
+            except ValueError:
+                pass
+        with self._lock:
+            if task not in self._identities:
+                self._identities[task] = next(self._counter)
+            return self._identities[task]
+
+    def fingerprint(self, task, store):
+        # None if one of the values can not be pickled, the task is then always executed
+        if isinstance(store, ResourceStore):
+            # Digests are computed once per version of the resources
+            digests = [(resource, store.digest(resource)) for resource in sorted(set(task.reads))]
+            if any(digest is None for _, digest in digests):
+                return None
+            return hashlib.blake2b(pickle.dumps((task.name, self.identity(task), digests)), digest_size=16).digest()
+        values = [(resource, store.get(resource)) for resource in sorted(set(task.reads))]
+        try:
+            data = pickle.dumps((task.name, self.identity(task), values), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def execute(self, task, store, execute=None):
+        # execute() runs the task when it is not in the cache, task.execute by default
+        key = self.fingerprint(task, store)
+        if key is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+            if entry is not None:
+                task.result, written = snapshot_values(entry)
+                store.update(written)
+                return True
+
+        (execute or task.execute)()
+
+        with self._lock:
+            self.misses += 1
+            if key is not None:
+                written = {resource: store[resource] for resource in task.writes if resource in store}
+                entry = snapshot_values((task.result, written))
+                if entry is not None:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+        return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+def snapshot_values(values):
+    # Deep copy sharing the read-only arrays, None if a value can not be copied
+    numpy = sys.modules.get("numpy")
+    memo = {}
+    if numpy is not None:
+        for value in (values[0], *values[1].values()):
+            if isinstance(value, numpy.ndarray) and not value.flags.writeable:
+                memo[id(value)] = value
+    try:
+        return copy.deepcopy(values, memo)
+    except (copy.Error, TypeError, pickle.PicklingError):
+        return None
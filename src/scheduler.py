@@ -0,0 +1,272 @@
+import heapq
+import queue
+import random
+import threading
+
+"""
+    Dataflow scheduler: instead of running the levels of the plan one after the other, a
+    task is dispatched as soon as its last predecessor in the max parallelism graph is
+    done. Every task keeps a counter of unfinished predecessors, decremented when one of
+    them finishes, so scheduling costs O(V + E) for the whole execution.
+
+    All the bookkeeping is done by the calling thread: workers only run the tasks and
+    report back through a queue, so the counters do not need any lock. It also lets the
+    scheduler bound the number of tasks running at the same time (max_in_flight) and
+    keep the other ready tasks in its own queue.
+
+    When there are more ready tasks than workers, the ready task with the highest upward
+    rank (its cost plus the longest path to the end of the graph, see ExecutionPlan) is
+    dispatched first: delaying the critical path delays the whole execution, delaying a
+    short branch does not (HEFT list scheduling).
+"""
+
+def start_thread(function, *args):
+    # Default way of running a task: one new thread per task
+    threading.Thread(target=function, args=args).start()
+
+def run_dataflow(plan, run_task, submit=start_thread, randomize=False, max_in_flight=None, on_ready=None, skip=None):
+    # run_task(i) executes the task of index i, submit(function, *args) runs it asynchronously
+    # and on_ready(i) is called when the last predecessor of task i is done. Tasks in skip are
+    # not executed but still complete in order, so the tasks after them keep waiting for
+    # the tasks before them.
+    n = len(plan.task_names)
+    remaining = list(plan.predecessor_counts)
+    finished = queue.SimpleQueue()
+    # Heap of (-rank, index) so ties are broken by insertion order of the tasks
+    ready = []
+    dispatched = []
+    errors = []
+    running = 0
+
+    def worker(i):
+        try:
+            run_task(i)
+            finished.put((i, None))
+        except BaseException as e:
+            finished.put((i, e))
+
+    def release(i):
+        # Task i is done, return the successors that have no predecessor left
+        newly_ready = []
+        for succ in plan.successors[i]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                newly_ready.append(succ)
+        return newly_ready
+
+    def makeReady(tasks):
+        stack = list(tasks)
+        while stack:
+            i = stack.pop()
+            if skip is not None and i in skip:
+                stack.extend(release(i))
+                continue
+            if on_ready is not None:
+                on_ready(i)
+            # Randomize the ready tasks to allow for potential non-deterministic behavior to be detected by detTestRnd
+            priority = random.random() if randomize else -plan.ranks[i]
+            heapq.heappush(ready, (priority, i))
+
+    def dispatch():
+        nonlocal running
+        while ready and (max_in_flight is None or running < max_in_flight):
+            _, i = heapq.heappop(ready)
+            dispatched.append(i)
+            running += 1
+            submit(worker, i)
+
+    makeReady([i for i in range(n) if remaining[i] == 0])
+    dispatch()
+
+    while running:
+        i, error = finished.get()
+        running -= 1
+
+        # Stop dispatching after the first error, the tasks already running are still waited for
+        if error is not None or errors:
+            if error is not None:
+                errors.append(error)
+            ready.clear()
+            continue
+
+        makeReady(release(i))
+        dispatch()
+
+    if errors:
+        raise errors[0]
+
+    return [plan.task_names[i] for i in dispatched]
+
+async def run_dataflow_async(plan, run_task, randomize=False, max_in_flight=None, on_ready=None):
+    # Same scheduling as run_dataflow but run_task(i) is a coroutine function and tasks
+    # are asyncio tasks of the running event loop, so they all share a single thread
+    import asyncio
+    n = len(plan.task_names)
+    remaining = list(plan.predecessor_counts)
+    finished = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight else None
+    dispatched = []
+    errors = []
+    # Keep a reference to the asyncio tasks so they are not garbage collected while running
+    pending = set()
+
+    async def worker(i):
+        try:
+            if semaphore is None:
+                await run_task(i)
+            else:
+                async with semaphore:
+                    await run_task(i)
+            finished.put_nowait((i, None))
+        except BaseException as e:
+            finished.put_nowait((i, e))
+
+    def dispatch(ready):
+        # Randomize the ready tasks to allow for potential non-deterministic behavior to be detected by detTestRnd
+        if randomize:
+            random.shuffle(ready)
+        for i in ready:
+            if on_ready is not None:
+                on_ready(i)
+            dispatched.append(i)
+            future = asyncio.ensure_future(worker(i))
+            pending.add(future)
+            future.add_done_callback(pending.discard)
+
+    dispatch([i for i in range(n) if remaining[i] == 0])
+    running = len(dispatched)
+
+    while running:
+        i, error = await finished.get()
+        running -= 1
+
+        # Stop dispatching after the first error, the tasks already running are still waited for
+        if error is not None or errors:
+            if error is not None:
+                errors.append(error)
+            continue
+
+        ready = []
+        for succ in plan.successors[i]:
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                ready.append(succ)
+        dispatch(ready)
+        running += len(ready)
+
+    if errors:
+        raise errors[0]
+
+    return [plan.task_names[i] for i in dispatched]
+
+"""
+    Pipelined version of run_dataflow for a stream of inputs: the same plan is executed once
+    per input (an iteration) and consecutive iterations overlap like a software pipeline. A
+    task of iteration k is dispatched when its predecessors of iteration k are done and when
+    the same task of iteration k - 1 is done, so each task sees the iterations in order and
+    upstream tasks of the next iterations run while downstream tasks finish the previous ones.
+
+    At most window iterations are in flight: the next input is only read once the oldest
+    iteration is done (backpressure). Ready tasks of older iterations are dispatched first.
+"""
+def run_pipeline(plan, inputs, run_task, start_iteration=lambda value: value, submit=start_thread, window=2, max_in_flight=None):
+    # start_iteration(value) gives the context of an iteration, run_task(context, i) executes task i
+    # in this context, and the contexts of the iterations are yielded in the order of the inputs
+    if window < 1:
+        raise ValueError(f"The window must be at least 1, got {window}")
+    n = len(plan.task_names)
+    inputs = iter(inputs)
+    finished = queue.SimpleQueue()
+    # Iteration -> [context, unfinished predecessors of each task, number of unfinished tasks]
+    iterations = {}
+    # Number of iterations done for each task, task i of iteration k waits until it is k
+    task_iterations = [0] * n
+    ready = []
+    completed = set()
+    errors = []
+    running = 0
+    nb_started = 0
+    next_output = 0
+    exhausted = False
+
+    def worker(k, i):
+        try:
+            run_task(iterations[k][0], i)
+            finished.put((k, i, None))
+        except BaseException as e:
+            finished.put((k, i, e))
+
+    def makeReady(k, i):
+        heapq.heappush(ready, (k, -plan.ranks[i], i))
+
+    def startIterations():
+        nonlocal nb_started, exhausted
+        while not exhausted and not errors and nb_started - next_output < window:
+            try:
+                value = next(inputs)
+            except StopIteration:
+                exhausted = True
+                return
+            k = nb_started
+            nb_started += 1
+            iterations[k] = [start_iteration(value), list(plan.predecessor_counts), n]
+            if n == 0:
+                completed.add(k)
+            for i in range(n):
+                if plan.predecessor_counts[i] == 0 and task_iterations[i] == k:
+                    makeReady(k, i)
+
+    def dispatch():
+        nonlocal running
+        while ready and (max_in_flight is None or running < max_in_flight):
+            k, _, i = heapq.heappop(ready)
+            running += 1
+            submit(worker, k, i)
+
+    try:
+        startIterations()
+        dispatch()
+        while running or next_output in completed:
+            # Outputs are yielded in order, as soon as possible
+            while next_output in completed:
+                completed.discard(next_output)
+                context = iterations.pop(next_output)[0]
+                next_output += 1
+                yield context
+                startIterations()
+                dispatch()
+            if not running:
+                break
+
+            k, i, error = finished.get()
+            running -= 1
+            # Stop dispatching after the first error, the tasks already running are still waited for
+            if error is not None or errors:
+                if error is not None:
+                    errors.append(error)
+                ready.clear()
+                continue
+
+            iteration = iterations[k]
+            iteration[2] -= 1
+            if iteration[2] == 0:
+                completed.add(k)
+            task_iterations[i] = k + 1
+            for succ in plan.successors[i]:
+                iteration[1][succ] -= 1
+                if iteration[1][succ] == 0 and task_iterations[succ] == k:
+                    makeReady(k, succ)
+            # The same task of the next iteration may only have been waiting for this one
+            following = iterations.get(k + 1)
+            if following is not None and following[1][i] == 0:
+                makeReady(k + 1, i)
+            startIterations()
+            dispatch()
+    finally:
+        # The consumer stopped early or an error occurred: wait for the tasks still running
+        while running:
+            finished.get()
+            running -= 1
+
+    if errors:
+        raise errors[0]
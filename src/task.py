@@ -1,17 +1,33 @@
 class Task:
-    def __init__(self, name: str, reads: list[str] = [], writes: list[str] = [], run: callable = None):
+    def __init__(self, name: str, reads: list[str] = [], writes: list[str] = [], run: callable = None, cost: float = None):
         self.name = name
         self.reads = reads
         self.writes = writes
         self.run = run
+        # Optional estimate of the execution time, used to run the critical path first
+        self.cost = cost
         self.result = None
 
     # Execute the test
     def execute(self):
         if self.run:
             self.result = self.run()
+            # The run function can be a coroutine function, run it to completion on its own event loop
+            if hasattr(self.result, "__await__"):
+                # Imported here to keep the import of the library fast, asyncio is only needed for async tasks
+                import asyncio
+                self.result = asyncio.run(self.result)
         else:
             self.result = self.name
 
+    # Execute the test from an event loop, regular run functions are sent to a thread to not block the loop
+    async def execute_async(self):
+        import asyncio
+        import inspect
+        if self.run and inspect.iscoroutinefunction(self.run):
+            self.result = await self.run()
+        else:
+            await asyncio.to_thread(self.execute)
+
     def get_result(self):
         return self.result   
\ No newline at end of file
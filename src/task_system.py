@@ -1,17 +1,66 @@
-import threading
-import time
+import copy
+import functools
+import os
 import random
-import networkx as nx
-import matplotlib.pyplot as plt
-import numpy as np
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from src.task import Task
-
+from src.execution_plan import ExecutionPlan
+from src.graph import CLOSURE_ENGINES, edges_to_matrix, find_cycle, orient_pairs, topological_order
+from src.scheduler import run_dataflow, run_dataflow_async, run_pipeline
+from src.locks import ReadWriteLock
+from src.process_backend import resource_values, run_in_process, task_store
+from src.plan_cache import load_plan, save_plan, system_hash
+from src.determinism import run_trials
+from src.exploration import explore
+from src.chunked import ChunkSubtask, expand_chunked_tasks
+from src.resource_store import ResourceStore
+
+"""
+    A task system can be used as a task of another system, under its name. By default it is
+    run as a unit: a single task reading and writing everything its tasks do, executed with
+    max parallelism by its own run(). Its analysis belongs to it (and to its cache_dir), so
+    changing its tasks without changing its r/w domains does not change the analysis of the
+    system containing it.
+
+    With inline=True, its tasks are added to the containing system instead, named
+    "name.task", so they can run in parallel with the other tasks. They inherit the
+    dependencies of the subsystem and a join task keeps its name for the tasks depending on
+    it. The edges of its plan are reused as they are, only the pairs of tasks between the
+    subsystem and the rest of the system are analysed.
+"""
 class TaskSystem:
-    def __init__(self, tasks: list[Task], precedence: dict[str, list[str]] = {}):
+    def __init__(self, tasks: list[Task], precedence: dict[str, list[str]] = {}, max_workers: int = None, pool: Executor = None, process_pool: Executor = None, cache_dir: str = None, name: str = None, inline: bool = False):
+        # Name and mode of the system when it is used as a task of another system
+        self.name = name
+        self.inline = inline
+        self.result = None
+        # Data-parallel tasks are replaced by their chunk subtasks and their join task
+        tasks, precedence = expand_chunked_tasks(tasks, precedence)
+        # Inlined subsystems are replaced by their tasks
+        tasks, precedence, inlined = expand_subsystems(tasks, precedence)
         # Use task name as key for easy access
         self.tasks = {task.name: task for task in tasks}
+        # Used as a task, a task system reads and writes everything its tasks do
+        self.reads = sorted({resource for task in self.tasks.values() for resource in task.reads})
+        self.writes = sorted({resource for task in self.tasks.values() for resource in task.writes})
         # Dictionary of task dependencies
         self.precedence = precedence
+        # Maximum number of tasks running at the same time (see workerCount)
+        self.max_workers = max_workers
+        # Worker pools kept alive across executions, a pool passed by the caller is never shut down by us
+        self._pool = pool
+        self._owns_pool = pool is None
+        self._process_pool = process_pool
+        self._owns_process_pool = process_pool is None
+        # Analysis of the system, built on demand by compile()
+        self._plan = None
+        self._conflicts = None
+        self._dependencies = None
+        self._order = None
+        # Inlined subsystems and the indices of their tasks in this system
+        index = {task_name: i for i, task_name in enumerate(self.tasks.keys())}
+        self._inlined = [(subsystem, [index[task_name] for task_name in task_names]) for subsystem, task_names in inlined]
 
         # Check for duplicate task names
         # Dictionary overwrites duplicates keys so we just need to compare its length with the number of tasks
@@ -21,15 +70,26 @@ class TaskSystem:
         # Check for empty task names
         self.checkEmptyTaskNames()
 
+        # Check for missing dependencies, the other checks need every dependency to exist.
+        # Done before the cache lookup: the hash only covers the dependencies of existing tasks
+        self.checkMissingDependencies()
+
+        # A system found in the cache has already been validated and analysed
+        cache_key = system_hash(self) if cache_dir is not None else None
+        if cache_key is not None:
+            self._plan = load_plan(cache_dir, cache_key)
+            if self._plan is not None:
+                return
+
         # Check for circular dependencies
         self.checkCircularDependencies()
 
-        # Check for missing dependencies
-        self.checkMissingDependencies()
-
         # Check if the task system is deterministic using the Bernstein condition
         self.checkDetBernstein()
 
+        if cache_key is not None:
+            save_plan(cache_dir, cache_key, self.compile())
+
     # The Task constructor already ensures that a name is provided but why not check it again 
     def checkEmptyTaskNames(self):
         for task_name in self.tasks.keys():
@@ -37,30 +97,14 @@ class TaskSystem:
                 raise ValueError("Task name cannot be empty")
             
     def checkCircularDependencies(self):
-        visited = set()
-        rec_stack = set()
-
-        # Depth-first search to detect circular dependencies
-        def dfs(task_name):
-            # Task is already in the current path being explored so circular dependency
-            if task_name in rec_stack:
-                raise Exception(f"Circular dependency detected: Task '{task_name}' is part of a cycle.")
-            
-            if task_name in visited:
-                return
-            
-            visited.add(task_name)
-            rec_stack.add(task_name)
-
-            for dep in self.getDependencies(task_name):
-                dfs(dep)
-            # Remove the task from the current path
-            rec_stack.remove(task_name)
-
-        # Outer loop
-        for task_name in self.tasks.keys():
-            if task_name not in visited:
-                dfs(task_name)
+        # Kahn's algorithm (see src/graph.py) instead of a recursive DFS, so long chains do not hit the recursion limit
+        try:
+            self.getOrder()
+        except ValueError:
+            cycle = find_cycle(self.getDependencyIndices())
+            task_names = list(self.tasks.keys())
+            path = " -> ".join(task_names[i] for i in cycle + cycle[:1])
+            raise Exception(f"Circular dependency detected: Task '{task_names[cycle[0]]}' is part of a cycle: {path}.") from None
             
     def checkMissingDependencies(self):
         # Loop through all tasks and check if they depend on tasks that do not exist
@@ -81,66 +125,94 @@ class TaskSystem:
     """
     def checkDetBernstein(self):
         # Check if the task system is deterministic using the Bernstein condition
-        for task1 in self.tasks.values():
-            for task2 in self.tasks.values():
-                if task1 == task2:
-                    continue
-
-                # Check for conflicts
-                if self.areTasksConflicting(task1, task2):
-                    raise Exception("Non-deterministic behavior detected: Tasks '{0}' and '{1}' are conflicting.".format(task1.name, task2.name))
-                
-    def createTransitiveClosureMatrix(self):
         task_names = list(self.tasks.keys())
-        n = len(task_names)
-
-        # Initialize the transitive closure matrix
-        transitive_closure = np.zeros((n, n), dtype=int)
-        for i, task_name in enumerate(task_names):
-            for dep in self.getDependencies(task_name):
-                j = task_names.index(dep)
-                transitive_closure[j, i] = 1
-
-        # Compute the transitive closure using the Floyd-Warshall algorithm
-        for k in range(n):
-            for i in range(n):
-                for j in range(n):
-                    transitive_closure[i, j] = transitive_closure[i, j] or (transitive_closure[i, k] and transitive_closure[k, j])
-
-        return transitive_closure
+        pairs, oriented = self.getConflicts()
+
+        # A conflicting pair is fine as long as there's a path between the two tasks
+        for (i, j), edge in zip(pairs, oriented):
+            if edge is None:
+                task1, task2 = sorted((i, j))
+                raise Exception("Non-deterministic behavior detected: Tasks '{0}' and '{1}' are conflicting.".format(task_names[task1], task_names[task2]))
+
+    def conflictingPairs(self):
+        # Inverted index of the r/w domains: resource -> indices of the tasks reading/writing it
+        readers = {}
+        writers = {}
+        for i, task in enumerate(self.tasks.values()):
+            for resource in set(task.reads):
+                readers.setdefault(resource, []).append(i)
+            for resource in set(task.writes):
+                writers.setdefault(resource, []).append(i)
+
+        # Tasks of the same inlined subsystem were already analysed by it (see getConflicts)
+        # and the chunks of the same ChunkedTask write disjoint slices of its output
+        block_of = {i: b for b, (_, indices) in enumerate(self._inlined) for i in indices}
+        for i, task in enumerate(self.tasks.values()):
+            if isinstance(task, ChunkSubtask) and i not in block_of:
+                block_of[i] = task.chunk_of
+
+        # Two tasks can only conflict if they share a resource written by one of them,
+        # so there is no need to look at every pair of tasks
+        pairs = set()
+        for resource, resource_writers in writers.items():
+            resource_readers = readers.get(resource, [])
+            for k, i in enumerate(resource_writers):
+                for j in resource_writers[k + 1:] + resource_readers:
+                    if i != j and (i not in block_of or block_of[i] != block_of.get(j)):
+                        pairs.add((min(i, j), max(i, j)))
+        return sorted(pairs)
+
+    def getConflicts(self):
+        # Conflicting pairs of tasks and, for each of them, the pair in execution order
+        # (None if no path links the two tasks), computed once
+        if self._conflicts is None:
+            pairs = self.conflictingPairs()
+            oriented = orient_pairs(self.getDependencyIndices(), pairs, self.getOrder())
+            # The plan of an inlined subsystem already orders its tasks
+            for subsystem, indices in self._inlined:
+                for i, j in subsystem.compile().edges():
+                    pairs.append((min(indices[i], indices[j]), max(indices[i], indices[j])))
+                    oriented.append((indices[i], indices[j]))
+            self._conflicts = (pairs, oriented)
+        return self._conflicts
+
+    """
+        The transitive closure can be computed by different engines (see src/graph.py):
+        - "bitset": ancestors stored as Python int bitsets, computed in topological order (default)
+        - "numpy": same algorithm with rows of NumPy bool arrays
+        - "floyd-warshall": the original O(n³) pure Python implementation
+    """
+    def createTransitiveClosureMatrix(self, engine="bitset"):
+        if engine not in CLOSURE_ENGINES:
+            raise ValueError(f"Unknown closure engine '{engine}', expected one of {list(CLOSURE_ENGINES)}")
+
+        return CLOSURE_ENGINES[engine](self.getDependencyIndices())
                 
     def createMatrix(self):
-        # Create max parallelism matrix
-        task_names = list(self.tasks.keys())
-        n = len(task_names)
-        transitive_closure = self.createTransitiveClosureMatrix()
-
-        # Create the max parallelism matrix by removing useless edges 
-        max_parallelism_matrix = transitive_closure.copy()
-        for i in range(n):
-            for j in range(n):
-                if i == j or transitive_closure[i, j] == 0:
-                    continue
-
-                task1 = self.tasks[task_names[i]]
-                task2 = self.tasks[task_names[j]]
-                # If two tasks are non-conflicting, they can run in parallel
-                if self.isBernstein(task1, task2):
-                    max_parallelism_matrix[i, j] = 1
-                else:
-                    max_parallelism_matrix[i, j] = 0
+        # Max parallelism matrix with every ordered conflicting pair, including the transitive
+        # edges dropped from the plan (see ExecutionPlan.dense_matrix for the reduced graph)
+        edges = [edge for edge in self.getConflicts()[1] if edge is not None]
+        return edges_to_matrix(edges, len(self.tasks))
 
-        return max_parallelism_matrix
+    """
+        Analysing a task system (conflicting pairs, max parallelism graph, levels...) is
+        much more expensive than running it, so the analysis is done once and cached. Every
+        execution method (run, runSeq, draw, parCost, detTestRnd) reuses the same plan.
+    """
+    def compile(self):
+        if self._plan is None:
+            self._plan = ExecutionPlan.from_task_system(self)
+        return self._plan
     
     def isBernstein(self, task1, task2):
         return set(task1.reads).intersection(task2.writes) or set(task1.writes).intersection(task2.reads) or set(task1.writes).intersection(task2.writes)
 
     def areTasksConflicting(self, task1, task2):
         task_names = list(self.tasks.keys())
-        transitive_closure = self.createTransitiveClosureMatrix()
+        i, j = task_names.index(task1.name), task_names.index(task2.name)
 
         # Check if there's a path between the two tasks
-        if transitive_closure[task_names.index(task1.name), task_names.index(task2.name)] == 1 or transitive_closure[task_names.index(task2.name), task_names.index(task1.name)] == 1:
+        if orient_pairs(self.getDependencyIndices(), [(i, j)])[0] is not None:
             return False
             
         # Bernstein condition
@@ -149,145 +221,349 @@ class TaskSystem:
     def getDependencies(self, task_name):
         # Retrieve the list of dependencies for a given task
         return self.precedence.get(task_name, [])
+
+    def getDependencyIndices(self):
+        # Dependencies of every task as task indices, the format used by src/graph.py, computed once
+        if self._dependencies is None:
+            # Use a dict instead of task_names.index() which is O(n)
+            index = {task_name: i for i, task_name in enumerate(self.tasks.keys())}
+            self._dependencies = [[index[dep] for dep in self.precedence.get(task_name, ())] for task_name in self.tasks.keys()]
+        return self._dependencies
+
+    def getOrder(self):
+        # Topological order of the precedence graph (task indices), raises ValueError if there is a cycle
+        if self._order is None:
+            self._order = topological_order(self.getDependencyIndices())
+        return self._order
     
-    def runSeq(self):
+    def runSeq(self, global_vars=None, result_cache=None):
         # Run tasks sequentially
         start_time = time.time()
         executed = []
 
         """
-            Because we want to allow tasks to be in any order in the self.tasks list, I need 
-            to visit all dependencies using a dfs before executing the task. This way, it 
-            ensures that all dependencies are executed before the task itself.
+            Because we want to allow tasks to be in any order in the self.tasks list, the
+            plan stores an order where every dependency comes before the task itself.
         """
-
-        # DFS function to visit all dependencies before executing the task
-        def visit(task_name):
-            if task_name in executed:
-                return
-            
-            for dep in self.getDependencies(task_name):
-                visit(dep)
-            
-            self.tasks[task_name].execute()
+        for task_name in self.compile().order:
+            task = self.tasks[task_name]
+            if isinstance(task, TaskSystem):
+                task.execute(global_vars, result_cache)
+            elif result_cache is not None:
+                result_cache.execute(task, task_store(task, global_vars))
+            else:
+                task.execute()
             executed.append(task_name)
 
-        for task_name in self.tasks.keys():
-            visit(task_name)
-
         elapsed_time = time.time() - start_time
         return executed, elapsed_time
 
-    def run(self, randomize_names=False, repr=False):
-        # Run tasks with maximum parallelism using the matrix
-        start_time = time.time()
-        task_names = list(self.tasks.keys())
-        n = len(task_names)
-        matrix = self.createMatrix()
+    def workerCount(self, backend="thread"):
+        # Number of tasks allowed to run at the same time
+        if self.max_workers is not None:
+            return self.max_workers
+        if backend == "process":
+            return os.cpu_count() or 1
+        # Same default as ThreadPoolExecutor
+        return min(32, (os.cpu_count() or 1) + 4)
+
+    def getPool(self, backend="thread"):
+        # Workers are created once and reused by every run() instead of one thread per task
+        if backend == "process":
+            if self._process_pool is None:
+                # Imported here because it pulls in multiprocessing, only needed by the process backend
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # The pool is created from a worker thread, forking a process with running threads
+                # is not safe: workers are started by a fork server (or spawned where there is none)
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._process_pool = ProcessPoolExecutor(max_workers=self.workerCount("process"), mp_context=multiprocessing.get_context(method))
+            return self._process_pool
+
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workerCount(), thread_name_prefix="hyperflow")
+        return self._pool
+
+    def shutdown(self, wait=True):
+        # Stop the workers, new pools are created if the system is run again
+        for task in self.tasks.values():
+            if isinstance(task, TaskSystem):
+                task.shutdown(wait)
+        if self._pool is not None and self._owns_pool:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+        if self._process_pool is not None and self._owns_process_pool:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
 
-        events = {task_name: threading.Event() for task_name in task_names}
-        resource_locks = {resource: threading.Lock() for task in self.tasks.values() for resource in task.reads + task.writes}
+    """
+        Tasks run on threads by default. With backend="process", the run function of each
+        task is executed in a worker process to escape the GIL: it must be picklable (a module
+        level function or a functools.partial of one) and its resources are read from and
+        written back to global_vars, or to the module globals of the function by default.
+
+        Pass a Tracer (see src/tracing.py) to record the timeline of every task and a
+        ResultCache (see src/result_cache.py) to skip tasks whose inputs did not change.
+        With only, just the given task names are executed (see run_incremental).
+    """
+    def run(self, randomize_names=False, repr=False, max_workers=None, backend="thread", global_vars=None, tracer=None, result_cache=None, only=None):
+        # Run tasks with maximum parallelism using the max parallelism graph of the plan
+        start_time = time.time()
+        plan = self.compile()
+        tasks = [self.tasks[task_name] for task_name in plan.task_names]
 
-        execution_representation = "start\n"
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Unknown backend '{backend}', expected 'thread' or 'process'")
 
-        def runTask(task):
-            for dep in self.getDependencies(task.name):
-                events[dep].wait()  # Wait for dependencies to complete
+        # Tasks only reading a resource share its lock, tasks writing it need it alone
+        resource_locks = {resource: ReadWriteLock() for task in tasks for resource in task.reads + task.writes}
 
+        def executeInProcess(task):
+            if not task.run:
+                task.execute()
+                return
+            store = task_store(task, global_vars)
+            future = self.getPool("process").submit(run_in_process, task.run, task.writes, resource_values(task, store))
+            task.result, written = future.result()
+            store.update(written)
+
+        def runTask(i):
+            task = tasks[i]
+            # Locks are always acquired in the same order to avoid deadlocks
             resources = sorted(set(task.reads + task.writes))
+            # Chunks of the same task write disjoint slices, they share the lock of the output
+            writes = set() if isinstance(task, ChunkSubtask) else set(task.writes)
             acquired = []
+            error = None
             try:
                 for resource in resources:
-                    resource_locks[resource].acquire()
+                    lock = resource_locks[resource]
+                    # Only time the locks that are not immediately available
+                    if tracer is not None and not lock.acquire(write=resource in writes, blocking=False):
+                        wait_start = time.perf_counter()
+                        lock.acquire(write=resource in writes)
+                        tracer.lock_waited(task.name, resource, time.perf_counter() - wait_start)
+                    elif tracer is None:
+                        lock.acquire(write=resource in writes)
                     acquired.append(resource)
 
-                task.execute()
+                if tracer is not None:
+                    tracer.task_started(task.name)
+                execute = (lambda: executeInProcess(task)) if backend == "process" else task.execute
+                if isinstance(task, TaskSystem):
+                    # A subsystem runs its own tasks, with the same resources and cache
+                    task.execute(global_vars, result_cache)
+                elif result_cache is not None:
+                    result_cache.execute(task, task_store(task, global_vars), execute)
+                else:
+                    execute()
+            except BaseException as e:
+                error = e
+                raise
             finally:
+                if tracer is not None:
+                    tracer.task_finished(task.name, error)
                 for resource in acquired:
-                    resource_locks[resource].release()
-
-            events[task.name].set()
-
-        # Determine task execution order based on max parallelism matrix
-        executed = set()
-        while len(executed) < n:
-            # Find tasks with no dependencies remaining
-            runnable_tasks = []
-            for i in range(n):
-                task_name = task_names[i]
-                if task_name in executed:
-                    continue
-                if all(matrix[j, i] == 0 or task_names[j] in executed for j in range(n)):
-                    runnable_tasks.append(self.tasks[task_name])
-
-            # Randomize runnable_tasks to allow for potential non-deterministic behavior to be detected by detTestRnd
-            if randomize_names:
-                random.shuffle(runnable_tasks)
-            # Add parallel block if multiple tasks are runnable
-            if len(runnable_tasks) > 1:
-                execution_representation += f"\tparbegin {' '.join(task.name for task in runnable_tasks)} parend;\n"
-            else:
-                execution_representation += f"\t{' '.join(task.name for task in runnable_tasks)}\n"
-            # Execute all runnable tasks in parallel
-            threads = []
-            for task in runnable_tasks:
-                t = threading.Thread(target=runTask, args=(task,))
-                t.start()
-                threads.append(t)
-                executed.add(task.name)
-
-            for t in threads:
-                t.join()
+                    resource_locks[resource].release(write=resource in writes)
+
+        if tracer is not None:
+            tracer.begin()
+        on_ready = (lambda i: tracer.task_ready(tasks[i].name)) if tracer is not None else None
+
+        # Tasks are dispatched as soon as all their predecessors are done, at most max_workers at a time
+        if max_workers is None:
+            max_workers = self.workerCount(backend)
+        skip = None
+        if only is not None:
+            only = set(only)
+            skip = {i for i, task in enumerate(tasks) if task.name not in only}
+        run_dataflow(plan, runTask, submit=self.getPool().submit, randomize=randomize_names, max_in_flight=max_workers, on_ready=on_ready, skip=skip)
         
         elapsed_time = time.time() - start_time
-        execution_representation += "end"
         if repr:
-            return elapsed_time, execution_representation
+            return elapsed_time, plan.representation()
         return elapsed_time
     
-    def detTestRnd(self, nb_trials=5, global_vars=None):
-        is_deterministic = True
+    """
+        Build-system style re-execution: when only some resources changed since the last
+        execution, only the tasks affected by the change need to run again. A task is
+        affected if it reads a changed resource, or if it reads or writes a resource written
+        by an affected task. Tasks are visited in topological order: by the Bernstein
+        condition, a task touching a resource written by an affected task is always after it.
+
+        An affected task reading a resource that a later task overwrote during the last
+        execution would read the overwritten value: the last task writing the resource
+        before it is affected too, so the value is produced again (and the later writers run
+        again since they write a resource written by an affected task). If no task produces
+        the value, it can not be recovered and every task is affected.
+    """
+    def affectedTasks(self, changed_resources):
+        changed = set(changed_resources)
+        order = self.compile().order
+        tasks = [self.tasks[task_name] for task_name in order]
+        # Resource -> positions in the order of the tasks writing it
+        writers = {}
+        for p, task in enumerate(tasks):
+            for resource in set(task.writes):
+                writers.setdefault(resource, []).append(p)
+
+        # Producers affected because of overwritten resources, until no new one is found
+        producers = set()
+        while True:
+            # Resources written by affected tasks
+            tainted = set()
+            affected = []
+            for p, task in enumerate(tasks):
+                if p in producers or changed.intersection(task.reads) or tainted.intersection(task.reads) or tainted.intersection(task.writes):
+                    affected.append(p)
+                    tainted.update(task.writes)
+
+            is_affected = set(affected)
+            missing = set()
+            for p in affected:
+                # The caller gives the new value of the changed resources
+                for resource in set(tasks[p].reads) - changed:
+                    resource_writers = writers.get(resource, [])
+                    if not resource_writers or resource_writers[-1] < p:
+                        continue
+                    before = [w for w in resource_writers if w < p]
+                    if not before:
+                        return list(order)
+                    if before[-1] not in is_affected:
+                        missing.add(before[-1])
+            if not missing:
+                return [order[p] for p in affected]
+            producers |= missing
+
+    def run_incremental(self, changed_resources, **kwargs):
+        # Run the affected tasks with the same max parallelism rules as run(), which gets the other arguments
+        affected = self.affectedTasks(changed_resources)
+        elapsed_time = self.run(only=affected, **kwargs)
+        return affected, elapsed_time
 
-        if global_vars is None:
-            global_vars = globals()
+    """
+        Streaming execution: the system is run once per input and consecutive runs overlap
+        (see run_pipeline in src/scheduler.py), at most window of them at a time. Each input
+        is a mapping of resource values used to create the ResourceStore of its iteration and
+        run functions are called with this store, run(store), so iterations never share their
+        resources. The stores are yielded in the order of the inputs once all tasks are done.
+        A subsystem run as a unit does not take a store, it must be inlined (inline=True).
+    """
+    def run_stream(self, inputs, window=2, max_workers=None):
+        for task in self.tasks.values():
+            if isinstance(task, TaskSystem):
+                raise ValueError(f"Task system '{task.name}' can not be streamed as a unit, use inline=True")
+        plan = self.compile()
+        tasks = [self.tasks[task_name] for task_name in plan.task_names]
 
-        # Get all the variables used by the system
-        shared_variables = {var for task in self.tasks.values() for var in task.reads + task.writes}
+        def runTask(store, i):
+            if tasks[i].run:
+                tasks[i].result = tasks[i].run(store)
 
-        for _ in range(nb_trials):
-            results = []
+        if max_workers is None:
+            max_workers = self.workerCount()
+        yield from run_pipeline(plan, inputs, runTask, start_iteration=ResourceStore, submit=self.getPool().submit, window=window, max_in_flight=max_workers)
 
-            # Randomize the variables
-            for task in self.tasks.values():
-                for var in task.reads + task.writes:
-                    if var not in global_vars:
-                        print(f"Warning: Variable '{var}' from task {task.name} does not exist in the globals dictionary.")
-                    global_vars[var] = np.random.randint(0, 100)
+    """
+        Asynchronous version of run() for I/O-bound tasks: run functions can be coroutine
+        functions (async def) and all tasks are scheduled on the running event loop, at most
+        max_concurrency at a time. Regular run functions are sent to a thread. No resource
+        lock is needed: conflicting tasks are always ordered by the max parallelism graph.
+    """
+    async def run_async(self, randomize_names=False, repr=False, max_concurrency=None, tracer=None):
+        start_time = time.time()
+        plan = self.compile()
+        tasks = [self.tasks[task_name] for task_name in plan.task_names]
 
-            # Store the values of the variables before the execution
-            initial_values = {var: global_vars[var] for var in shared_variables}
+        async def runTask(i):
+            if tracer is None:
+                await tasks[i].execute_async()
+                return
+            tracer.task_started(tasks[i].name)
+            try:
+                await tasks[i].execute_async()
+            except BaseException as e:
+                tracer.task_finished(tasks[i].name, e)
+                raise
+            tracer.task_finished(tasks[i].name)
 
-            for _ in range(2):
-                self.run(randomize_names=True)
-                
-                # Store the values of the variables after the execution
-                result = {var: global_vars[var] for var in shared_variables}
-                results.append(result)
-                
-                # Reset the variables to their random values given at the beggining of this trial
-                for var, value in initial_values.items():
-                    global_vars[var] = value
-
-            if results[0] != results[1]:
-                is_deterministic = False
-                print("Task system is not deterministic: ", results[0], results[1])
-                break
-        
-        if is_deterministic:
+        if tracer is not None:
+            tracer.begin()
+        on_ready = (lambda i: tracer.task_ready(tasks[i].name)) if tracer is not None else None
+
+        await run_dataflow_async(plan, runTask, randomize=randomize_names, max_in_flight=max_concurrency, on_ready=on_ready)
+
+        elapsed_time = time.time() - start_time
+        if repr:
+            return elapsed_time, plan.representation()
+        return elapsed_time
+
+    """
+        Task interface, used when the system is a task of another system (see the top of
+        the class). The cost of the system is the cost of its critical path.
+    """
+    @property
+    def cost(self):
+        return max(self.compile().ranks, default=0)
+
+    def execute(self, global_vars=None, result_cache=None):
+        self.run(global_vars=global_vars, result_cache=result_cache)
+        self.result = {task_name: task.result for task_name, task in self.tasks.items()}
+
+    async def execute_async(self):
+        await self.run_async()
+        self.result = {task_name: task.result for task_name, task in self.tasks.items()}
+
+    def get_result(self):
+        return self.result
+
+    """
+        Random testing of determinism: each trial gives random values to the resources and
+        runs the system twice with randomized dispatch orders. Trials stop at the first
+        divergence, with workers > 1 they run in parallel worker processes on isolated copies
+        of the resources (see src/determinism.py). The returned report is truthy if no divergence was found and
+        gives, for a diverging trial, the values and the two interleavings of the tasks.
+    """
+    def detTestRnd(self, nb_trials=5, global_vars=None, workers=None):
+        # Get all the variables used by the system
+        shared_variables = sorted({var for task in self.tasks.values() for var in task.reads + task.writes})
+        trials = [{var: random.randint(0, 99) for var in shared_variables} for _ in range(nb_trials)]
+
+        report = run_trials(self, trials, global_vars, workers)
+
+        if report.deterministic:
             print("Task system is deterministic!")
+        else:
+            divergence = report.divergences[0]
+            print("Task system is not deterministic: ", divergence.results[0], divergence.results[1])
+            print("Interleavings: ", divergence.interleavings[0], divergence.interleavings[1])
+
+        return report
+
+    """
+        Systematic version of detTestRnd: the system is executed sequentially in the orders
+        that can change its results, found from the pairs of unordered tasks using the same
+        resources, declared or not (see src/exploration.py). Small systems are checked
+        exhaustively, larger ones by sampling at most max_executions of these orders.
+    """
+    def detTestExplore(self, max_executions=100, global_vars=None, seed=None):
+        report = explore(self, global_vars, max_executions, seed)
+
+        if report.deterministic:
+            print(f"Task system is deterministic! ({report.trials} executions explored)")
+        else:
+            divergence = report.divergences[0]
+            print("Task system is not deterministic: ", divergence.results[0], divergence.results[1])
+            print("Interleavings: ", divergence.interleavings[0], divergence.interleavings[1])
+
+        return report
 
-        return is_deterministic
-        
     """
         After some (long) research for drawing graphs with levels, I found that Graphviz is 
         one of the most popular tools for this purpose. However, using Graphviz requires 
@@ -296,10 +572,14 @@ class TaskSystem:
         decided to manually implement the level logic using the networkx and matplotlib libraries.
     """
     def draw(self):
-        # Get max parallelism matrix
-        matrix = self.createMatrix()
-        task_names = list(self.tasks.keys())
-        n = len(task_names)
+        # Visualization libraries are slow to import and only needed here
+        import networkx as nx
+        import matplotlib.pyplot as plt
+        import numpy as np
+
+        # Get max parallelism graph
+        plan = self.compile()
+        task_names = plan.task_names
 
         # Create directed graph
         G = nx.DiGraph()
@@ -308,27 +588,12 @@ class TaskSystem:
         for task_name in task_names:
             G.add_node(task_name)
 
-        # Add edges based on max parallelism matrix
-        for i in range(n):
-            for j in range(n):
-                if matrix[i, j] == 1:  
-                    G.add_edge(task_names[i], task_names[j])
-
-        # Remove useless edges
-        G = nx.transitive_reduction(G)
-
-        # Compute task levels for visualization
-        levels = {}
-        for task_name in nx.topological_sort(G):
-            level = max([levels.get(dep, 0) for dep in G.predecessors(task_name)], default=-1) + 1
-            levels[task_name] = level
+        # Add edges of the max parallelism graph, useless edges are already removed by the plan
+        for i, j in plan.edges():
+            G.add_edge(task_names[i], task_names[j])
 
-        # Group tasks by level
-        level_dict = {}
-        for task, level in levels.items():
-            if level not in level_dict:
-                level_dict[level] = []
-            level_dict[level].append(task)
+        # Task levels are already computed by the plan
+        level_dict = {level: list(tasks) for level, tasks in enumerate(plan.levels)}
 
         # Calculate positions for each task
         pos = {}
@@ -353,7 +618,7 @@ class TaskSystem:
         plt.title("Max Parallelism Graph", fontsize=14, fontweight="bold")
         plt.show()
     
-    def parCost(self, runs=5):
+    def parCost(self, runs=5, backend="thread"):
         seq_times = []
         par_times = []
 
@@ -365,7 +630,7 @@ class TaskSystem:
 
             # Parallel
             start = time.time()
-            self.run()
+            self.run(backend=backend)
             par_times.append(time.time() - start)
 
         # Calculate average times
@@ -374,4 +639,56 @@ class TaskSystem:
 
         print(f"Average Sequential Execution Time: {avg_seq_time:.5f} sec")
         print(f"Average Parallel Execution Time: {avg_par_time:.5f} sec")
-        print(f"Speedup Factor: {avg_seq_time / avg_par_time:.2f}x")
\ No newline at end of file
+        print(f"Speedup Factor: {avg_seq_time / avg_par_time:.2f}x")
+
+def expand_subsystems(tasks, precedence):
+    # Replace every inlined subsystem by its tasks and a join task, returns the new tasks and
+    # precedence and, for each subsystem, the names of its tasks in the same order as its plan
+    for task in tasks:
+        if isinstance(task, TaskSystem) and not task.name:
+            raise ValueError("A task system used as a task must have a name")
+    if not any(isinstance(task, TaskSystem) and task.inline for task in tasks):
+        return tasks, precedence, []
+
+    expanded = []
+    inlined = []
+    precedence = dict(precedence)
+    for task in tasks:
+        if not (isinstance(task, TaskSystem) and task.inline):
+            expanded.append(task)
+            continue
+        prefix = f"{task.name}."
+        deps = list(precedence.get(task.name, []))
+        task_names = [prefix + member_name for member_name in task.tasks]
+        has_successors = set()
+        members = {}
+        for member_name, member in task.tasks.items():
+            # Members are copied under their new name, keeping their class and state
+            member = copy.copy(member)
+            member.name = prefix + member_name
+            if isinstance(member, ChunkSubtask):
+                member.chunk_of = prefix + member.chunk_of
+            elif isinstance(member, TaskSystem):
+                # The copy creates its own workers, the ones of the original are not shared
+                member._pool = None
+                member._owns_pool = True
+                member._process_pool = None
+                member._owns_process_pool = True
+            expanded.append(member)
+            members[member_name] = member
+            member_deps = task.getDependencies(member_name)
+            has_successors.update(member_deps)
+            # Tasks without dependencies in the subsystem wait for the dependencies of the subsystem
+            precedence[prefix + member_name] = [prefix + dep for dep in member_deps] if member_deps else deps
+        expanded.append(Task(name=task.name, run=functools.partial(join_subsystem, task, members), cost=0))
+        precedence[task.name] = [prefix + member_name for member_name in task.tasks if member_name not in has_successors]
+        inlined.append((task, task_names))
+    return expanded, precedence, inlined
+
+def join_subsystem(subsystem, members, store=None):
+    # Join task of an inlined subsystem: the results of the copies of its tasks are given back
+    # to it (run_stream also gives the store of the iteration, not used)
+    for member_name, member in members.items():
+        subsystem.tasks[member_name].result = member.result
+    subsystem.result = {member_name: member.result for member_name, member in members.items()}
+    return subsystem.result
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+"""
+    Opt-in execution tracer. Pass a Tracer to TaskSystem.run() (or run_async()) and it records
+    for every task when it became ready, how long it waited for its resource locks, when it
+    started and ended, on which thread and whether it raised. The result can be exported as a
+    Chrome trace-event JSON file (open it in chrome://tracing or https://ui.perfetto.dev) or
+    printed as a summary table.
+
+    Times are in seconds since the beginning of the traced execution.
+"""
+
+@dataclass
+class TaskRecord:
+    name: str
+    ready: float = None
+    start: float = None
+    end: float = None
+    thread: int = None
+    thread_name: str = None
+    # Time spent waiting for each resource lock that was not immediately available
+    lock_waits: dict = field(default_factory=dict)
+    error: str = None
+
+    @property
+    def lock_wait(self):
+        return sum(self.lock_waits.values())
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.end is not None and self.start is not None else 0.0
+
+    @property
+    def queued(self):
+        # Time between the task being ready and being started, without the lock waits
+        if self.ready is None or self.start is None:
+            return 0.0
+        return max(0.0, self.start - self.ready - self.lock_wait)
+
+class Tracer:
+    def __init__(self):
+        self.records = {}
+        self._origin = None
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return time.perf_counter() - self._origin
+
+    def _record(self, name):
+        with self._lock:
+            if name not in self.records:
+                self.records[name] = TaskRecord(name)
+            return self.records[name]
+
+    # Called by the task system at the beginning of an execution, previous records are dropped
+    def begin(self):
+        self.records = {}
+        self._origin = time.perf_counter()
+
+    def task_ready(self, name):
+        self._record(name).ready = self._now()
+
+    def lock_waited(self, name, resource, seconds):
+        self._record(name).lock_waits[resource] = seconds
+
+    def task_started(self, name):
+        record = self._record(name)
+        record.start = self._now()
+        record.thread = threading.get_ident()
+        record.thread_name = threading.current_thread().name
+
+    def task_finished(self, name, error=None):
+        record = self._record(name)
+        record.end = self._now()
+        if error is not None:
+            record.error = repr(error)
+
+    def makespan(self):
+        ends = [record.end for record in self.records.values() if record.end is not None]
+        return max(ends, default=0.0)
+
+    def parallelism(self):
+        # Average number of tasks running at the same time
+        makespan = self.makespan()
+        if not makespan:
+            return 0.0
+        return sum(record.duration for record in self.records.values()) / makespan
+
+    def contended_resources(self):
+        # Total time spent waiting for each resource lock, most contended first
+        waits = {}
+        for record in self.records.values():
+            for resource, seconds in record.lock_waits.items():
+                waits[resource] = waits.get(resource, 0.0) + seconds
+        return dict(sorted(waits.items(), key=lambda item: item[1], reverse=True))
+
+    def to_chrome_trace(self, path=None):
+        # Complete events ("X") in microseconds, lock waits are shown right before their task
+        pid = os.getpid()
+        events = []
+        for record in self.records.values():
+            if record.start is None:
+                continue
+            args = {"ready": record.ready, "queued": record.queued, "lock_wait": record.lock_wait}
+            if record.error:
+                args["error"] = record.error
+            if record.lock_wait:
+                events.append({
+                    "name": f"{record.name} (lock wait)", "cat": "lock", "ph": "X", "pid": pid, "tid": record.thread,
+                    "ts": (record.start - record.lock_wait) * 1e6, "dur": record.lock_wait * 1e6,
+                    "args": {"resources": record.lock_waits},
+                })
+            events.append({
+                "name": record.name, "cat": "task", "ph": "X", "pid": pid, "tid": record.thread,
+                "ts": record.start * 1e6, "dur": record.duration * 1e6, "args": args,
+            })
+
+        trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(trace, f)
+        return trace
+
+    def summary(self):
+        lines = [f"{'task':<20} {'thread':<24} {'ready':>9} {'queued':>9} {'lock wait':>10} {'duration':>9}  status"]
+        records = sorted(self.records.values(), key=lambda record: (record.start is None, record.start or 0.0))
+        for record in records:
+            status = "error: " + record.error if record.error else ("ok" if record.end is not None else "not run")
+            ready = f"{record.ready:.5f}" if record.ready is not None else "-"
+            lines.append(
+                f"{record.name:<20} {str(record.thread_name):<24} {ready:>9} {record.queued:>9.5f} "
+                f"{record.lock_wait:>10.5f} {record.duration:>9.5f}  {status}"
+            )
+        lines.append(f"Makespan: {self.makespan():.5f} sec, average parallelism: {self.parallelism():.2f}")
+        contended = {resource: seconds for resource, seconds in self.contended_resources().items() if seconds > 0}
+        if contended:
+            lines.append("Contended resources: " + ", ".join(f"{resource} ({seconds:.5f} sec)" for resource, seconds in contended.items()))
+        return "\n".join(lines)
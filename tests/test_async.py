@@ -0,0 +1,64 @@
+import asyncio
+import threading
+from functools import partial
+from src.task_system import TaskSystem
+from src.task import Task
+
+def test_task_execute_coroutine():
+    async def runT1():
+        await asyncio.sleep(0)
+        return 42
+
+    task = Task(name="T1", run=runT1)
+    # Coroutine functions also work with the synchronous execution methods
+    task.execute()
+    assert task.get_result() == 42
+
+def test_run_async_single_thread():
+    # 1000 I/O-bound tasks sleeping at the same time, all on the event loop thread
+    threads = set()
+
+    async def io_task():
+        threads.add(threading.get_ident())
+        await asyncio.sleep(0.2)
+
+    tasks = [Task(name=f"T{i}", run=io_task) for i in range(1000)]
+    task_system = TaskSystem(tasks)
+    elapsed_time = asyncio.run(task_system.run_async())
+
+    assert len(threads) == 1
+    assert elapsed_time < 2
+
+def test_run_async_respects_dependencies():
+    order = []
+
+    async def record(name):
+        await asyncio.sleep(0.01)
+        order.append(name)
+
+    tasks = [
+        Task(name="T1", writes=["X"], run=partial(record, "T1")),
+        Task(name="T2", reads=["X"], writes=["Y"], run=partial(record, "T2")),
+        # Regular functions are supported too
+        Task(name="T3", reads=["Y"], run=lambda: order.append("T3")),
+    ]
+    task_system = TaskSystem(tasks, {"T2": ["T1"], "T3": ["T2"]})
+    asyncio.run(task_system.run_async())
+
+    assert order == ["T1", "T2", "T3"]
+
+def test_run_async_max_concurrency():
+    running = 0
+    max_running = 0
+
+    async def io_task():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    tasks = [Task(name=f"T{i}", run=io_task) for i in range(20)]
+    asyncio.run(TaskSystem(tasks).run_async(max_concurrency=4))
+
+    assert max_running == 4
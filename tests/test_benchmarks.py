@@ -0,0 +1,10 @@
+from benchmarks.generators import GENERATORS
+from src.task_system import TaskSystem
+
+def test_generators_are_deterministic_task_systems():
+    # The TaskSystem constructor raises if a generator creates conflicting tasks
+    for generator in GENERATORS.values():
+        tasks, precedence = generator(200)
+        assert len(tasks) == 200
+        with TaskSystem(tasks, precedence) as task_system:
+            task_system.run()
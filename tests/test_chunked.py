@@ -0,0 +1,70 @@
+import pickle
+import numpy as np
+from src.task import Task
+from src.task_system import TaskSystem
+from src.chunked import ChunkedTask, SharedArray
+
+def multiply(out, A, B):
+    np.dot(A, B, out=out)
+
+def add_one(out, A):
+    np.add(A, 1, out=out)
+
+def test_shared_array_pickles_by_name():
+    with SharedArray.from_array(np.arange(6.0).reshape(2, 3)) as shared:
+        attached = pickle.loads(pickle.dumps(shared))
+        assert attached.name == shared.name
+        # Both arrays are views of the same memory
+        attached.array[0, 0] = 42
+        assert shared.array[0, 0] == 42
+        attached.close()
+
+def test_chunked_task_expansion():
+    with SharedArray((10,)) as A, SharedArray((10,)) as B:
+        tasks = [
+            Task("T1", writes=["A"]),
+            ChunkedTask("T2", add_one, output=B, inputs=[A], reads=["A"], writes=["B"], nb_chunks=3),
+            Task("T3", reads=["B"]),
+        ]
+        precedence = {"T2": ["T1"], "T3": ["T2"]}
+        task_system = TaskSystem(tasks, precedence)
+
+        assert list(task_system.tasks) == ["T1", "T2[0]", "T2[1]", "T2[2]", "T2", "T3"]
+        assert task_system.getDependencies("T2[1]") == ["T1"]
+        assert task_system.getDependencies("T2") == ["T2[0]", "T2[1]", "T2[2]"]
+        # The precedence of the caller is not modified
+        assert precedence == {"T2": ["T1"], "T3": ["T2"]}
+        # The chunks run in parallel, between T1 and the join
+        assert task_system.compile().levels == (("T1",), ("T2[0]", "T2[1]", "T2[2]"), ("T2",), ("T3",))
+
+def test_chunked_task_run():
+    A = np.random.rand(7, 4)
+    B = np.random.rand(4, 5)
+    with SharedArray.from_array(A) as shared_A, SharedArray.from_array(B) as shared_B, SharedArray((7, 5)) as C:
+        # Rows of the result are computed by different chunks, B is given whole to each of them
+        task = ChunkedTask("T", multiply, output=C, inputs=[shared_A, shared_B], split=[0], reads=["A", "B"], writes=["C"], nb_chunks=3)
+        for backend in ("thread", "process"):
+            C.array[...] = 0
+            with TaskSystem([task]) as task_system:
+                task_system.run(backend=backend)
+                assert np.allclose(C.array, A @ B)
+                assert task_system.tasks["T"].result.name == C.name
+
+        # Alone, the task computes the whole result
+        C.array[...] = 0
+        task.execute()
+        assert np.allclose(C.array, A @ B)
+
+def test_chunked_task_keeps_orderings():
+    with SharedArray((4,)) as A, SharedArray((4,)) as B:
+        # R reads B before the chunks overwrite it, they must wait for it
+        tasks = [Task("R", reads=["B"]), ChunkedTask("W", add_one, output=B, inputs=[A], reads=["A"], writes=["B"], nb_chunks=2)]
+        task_system = TaskSystem(tasks, {"W": ["R"]})
+        assert task_system.compile().levels == (("R",), ("W[0]", "W[1]"), ("W",))
+
+        # Without the dependency, the chunks conflict with R like the original task
+        try:
+            TaskSystem(tasks)
+            assert False
+        except Exception as e:
+            assert "Non-deterministic behavior detected" in str(e)
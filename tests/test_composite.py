@@ -0,0 +1,130 @@
+from src.task import Task
+from src.task_system import TaskSystem
+
+def subsystem(log, inline=False):
+    tasks = [
+        Task("T1", writes=["X"], run=lambda: log.append("T1")),
+        Task("T2", reads=["X"], writes=["Y"], run=lambda: log.append("T2")),
+    ]
+    return TaskSystem(tasks, {"T2": ["T1"]}, name="sub", inline=inline)
+
+def test_subsystem_as_unit():
+    log = []
+    sub = subsystem(log)
+    assert sub.reads == ["X"] and sub.writes == ["X", "Y"]
+    assert sub.cost == 2
+
+    with TaskSystem([sub, Task("T3", reads=["Y"], run=lambda: log.append("T3"))], {"T3": ["sub"]}) as task_system:
+        assert task_system.compile().levels == (("sub",), ("T3",))
+        task_system.run()
+        assert log == ["T1", "T2", "T3"]
+        assert sub.get_result() == {"T1": None, "T2": None}
+
+        log.clear()
+        task_system.runSeq()
+        assert log == ["T1", "T2", "T3"]
+
+def test_subsystem_inline():
+    log = []
+    sub = subsystem(log, inline=True)
+    tasks = [sub, Task("T3", reads=["Y"], run=lambda: log.append("T3")), Task("T4", writes=["Z"])]
+
+    # The plan of the subsystem (compiled or read from its cache) is reused, its tasks are not analysed again
+    sub.compile()
+
+    def fail():
+        raise AssertionError("The subsystem should not be analysed again")
+    sub.getConflicts = fail
+
+    with TaskSystem(tasks, {"T3": ["sub"]}) as task_system:
+        assert list(task_system.tasks) == ["sub.T1", "sub.T2", "sub", "T3", "T4"]
+        assert task_system.getDependencies("sub") == ["sub.T2"]
+        # T4 runs in parallel with the tasks of the subsystem
+        assert task_system.compile().levels == (("sub.T1", "sub", "T4"), ("sub.T2",), ("T3",))
+        task_system.run()
+        assert log == ["T1", "T2", "T3"]
+        # The results of the tasks are given back to the subsystem
+        assert sub.get_result() == {"T1": None, "T2": None}
+        assert sub.tasks["T1"].result is None and task_system.tasks["sub.T1"].result is None
+
+def test_subsystem_inline_conflicts():
+    # T3 writes X without being ordered with the tasks of the subsystem
+    sub = subsystem([], inline=True)
+    try:
+        TaskSystem([sub, Task("T3", writes=["X"])])
+        assert False
+    except Exception as e:
+        assert str(e) == "Non-deterministic behavior detected: Tasks 'sub.T1' and 'T3' are conflicting."
+
+def increment():
+    global Y
+    Y = X + 1
+
+def test_subsystem_uses_resources_of_its_tasks():
+    import src.task_system
+    from src.result_cache import ResultCache
+    global X, Y
+    X, Y = 1, 0
+
+    sub = TaskSystem([Task("T1", reads=["X"], writes=["Y"], run=increment)], name="sub")
+    cache = ResultCache()
+    with TaskSystem([sub]) as task_system:
+        task_system.run(result_cache=cache)
+        assert Y == 2
+
+        # The tasks of the subsystem are memoized with their own inputs
+        X = 5
+        task_system.run(result_cache=cache)
+        assert Y == 6
+        assert cache.hits == 0
+
+        # Random values are given to the resources of the tasks of the subsystem, not to the library
+        assert task_system.detTestRnd(nb_trials=3, workers=1)
+        assert (X, Y) == (5, 6)
+        assert "X" not in vars(src.task_system)
+
+def test_subsystem_without_name():
+    for inline in (False, True):
+        sub = TaskSystem([Task("T1", writes=["X"])], inline=inline)
+        try:
+            TaskSystem([sub])
+            assert False
+        except ValueError as e:
+            assert str(e) == "A task system used as a task must have a name"
+
+def test_subsystem_inline_keeps_tasks():
+    import threading
+    import time
+    import numpy as np
+    from src.chunked import ChunkedTask, SharedArray
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def kernel(out, A):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        out[...] = A + 1
+        with lock:
+            running[0] -= 1
+
+    with SharedArray.from_array(np.zeros(4)) as A, SharedArray((4,)) as B:
+        chunked = ChunkedTask("C", kernel, output=B, inputs=[A], reads=["A"], writes=["B"], nb_chunks=4)
+        sub = TaskSystem([chunked], name="sub", inline=True)
+        with TaskSystem([sub], max_workers=4) as task_system:
+            # The chunks are still chunks of the same task, they run in parallel
+            assert task_system.compile().levels[0][:4] == ("sub.C[0]", "sub.C[1]", "sub.C[2]", "sub.C[3]")
+            task_system.run()
+        assert peak[0] == 4
+        assert (B.array == 1).all()
+
+def test_subsystem_inline_unit_member_workers():
+    inner = TaskSystem([Task("T1", writes=["X"])], name="inner")
+    # inner already has workers when it is copied
+    inner.run()
+    outer = TaskSystem([inner], name="outer", inline=True)
+    with TaskSystem([outer]) as task_system:
+        task_system.run()
+    # Shutting down the copy of inner does not shut down the workers of inner
+    inner.run()
+    inner.shutdown()
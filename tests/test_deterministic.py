@@ -59,4 +59,29 @@ def test_deterministic():
     
 def test_non_deterministic_task_system():
     system = non_deterministic_task_system()
-    assert not system.detTestRnd(nb_trials=5, global_vars=globals())
\ No newline at end of file
+    assert not system.detTestRnd(nb_trials=5, global_vars=globals())
+    
+def test_non_deterministic_report():
+    global X, Y, Z
+    X, Y, Z = 1, 2, 3
+    system = non_deterministic_task_system()
+    report = system.detTestRnd(nb_trials=50, global_vars=globals(), workers=2)
+    assert not report.deterministic
+    assert report.trials <= 50
+
+    # The two executions started the tasks in different orders and gave different results
+    divergence = report.divergences[0]
+    assert divergence.results[0] != divergence.results[1]
+    assert divergence.interleavings[0] != divergence.interleavings[1]
+    assert sorted(divergence.interleavings[0]) == ["T1", "T2", "T3"]
+
+    # Trials ran on copies of the resources
+    assert (X, Y, Z) == (1, 2, 3)
+
+def test_det_test_rnd_serial_restores_values():
+    global X, Y, Z
+    X, Y, Z = 1, 2, 3
+    system = deterministic_task_system()
+    report = system.detTestRnd(nb_trials=3, global_vars=globals(), workers=1)
+    assert report and report.trials == 3
+    assert (X, Y, Z) == (1, 2, 3)
@@ -0,0 +1,58 @@
+from src.task import Task
+from src.task_system import TaskSystem
+from src.exploration import task_footprint, racy_pairs
+
+A, B, C = 0, 0, 0
+
+def runA():
+    global A
+    A += 1
+
+def runB():
+    global B
+    B = A * 2
+
+def runC():
+    global C
+    C = B + 1
+
+def test_task_footprint():
+    # B is only declared as written, the read of A is found in the bytecode
+    task = Task("TB", writes=["B"], run=runB)
+    assert task_footprint(task, globals()) == ({"A"}, {"B"})
+
+def test_explore_finds_undeclared_race():
+    global A, B, C
+    A, B, C = 1, 2, 3
+    system = TaskSystem([Task("TA", writes=["A"], run=runA), Task("TB", writes=["B"], run=runB)])
+    plan = system.compile()
+    footprints = [task_footprint(system.tasks[name], globals()) for name in plan.task_names]
+    assert racy_pairs(plan, footprints) == [(0, 1)]
+
+    report = system.detTestExplore()
+    assert not report
+    # Both orders of the racy pair are enough to find it
+    assert report.trials == 2
+    divergence = report.divergences[0]
+    assert {tuple(order) for order in divergence.interleavings} == {("TA", "TB"), ("TB", "TA")}
+    assert divergence.results[0]["B"] != divergence.results[1]["B"]
+    # The values of the caller are restored
+    assert (A, B, C) == (1, 2, 3)
+
+def test_explore_deterministic():
+    # Correctly declared and ordered, there is nothing to explore
+    tasks = [
+        Task("TA", writes=["A"], run=runA),
+        Task("TB", reads=["A"], writes=["B"], run=runB),
+        Task("TC", reads=["B"], writes=["C"], run=runC),
+    ]
+    report = TaskSystem(tasks, {"TB": ["TA"], "TC": ["TB"]}).detTestExplore()
+    assert report and report.trials == 1
+
+def test_explore_samples_large_systems():
+    # 30 tasks reading A without declaring it and one task writing it: too many orders to enumerate
+    tasks = [Task("TA", writes=["A"], run=runA)]
+    tasks += [Task(f"T{i}", writes=[f"R{i}"], run=runB) for i in range(30)]
+    report = TaskSystem(tasks).detTestExplore(max_executions=20, seed=0)
+    assert not report
+    assert report.trials <= 20
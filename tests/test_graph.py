@@ -0,0 +1,79 @@
+import random
+from src.graph import topological_order, ancestor_bitsets, orient_pairs, transitive_reduction, bitset_to_indices, CLOSURE_ENGINES
+from src.task_system import TaskSystem
+from src.task import Task
+
+def random_dependencies(n, seed=0):
+    # Each task depends on a few random tasks with a lower index, so the graph is acyclic
+    rng = random.Random(seed)
+    return [rng.sample(range(i), min(i, rng.randint(0, 3))) for i in range(n)]
+
+def test_topological_order():
+    dependencies = [[2], [], [1]]
+    assert topological_order(dependencies) == [1, 2, 0]
+
+def test_topological_order_cycle():
+    try:
+        topological_order([[1], [0]])
+        assert False
+    except ValueError as e:
+        assert str(e) == "The graph contains a cycle"
+    # Only the tasks before the cycle are ordered
+    assert topological_order([[], [0, 2], [1]], partial=True) == [0]
+
+def test_ancestor_bitsets():
+    # 0 -> 1 -> 2 and 3 is independent
+    ancestors = ancestor_bitsets([[], [0], [1], []])
+    assert [bitset_to_indices(bits) for bits in ancestors] == [[], [0], [0, 1], []]
+
+def test_orient_pairs():
+    # 0 -> 1 -> 2 and 3 is independent
+    dependencies = [[], [0], [1], []]
+    assert orient_pairs(dependencies, [(0, 2), (2, 0), (3, 1), (1, 2)]) == [(0, 2), (0, 2), None, (1, 2)]
+
+def test_orient_pairs_agree_with_closure():
+    dependencies = random_dependencies(60)
+    ancestors = ancestor_bitsets(dependencies)
+    pairs = [(i, j) for i in range(60) for j in range(60) if i != j]
+    for (i, j), edge in zip(pairs, orient_pairs(dependencies, pairs)):
+        if ancestors[j] >> i & 1:
+            assert edge == (i, j)
+        elif ancestors[i] >> j & 1:
+            assert edge == (j, i)
+        else:
+            assert edge is None
+
+def test_transitive_reduction():
+    # 0 -> 1 -> 2 with a useless 0 -> 2 edge, 3 only depends on 0
+    assert transitive_reduction([[], [0], [0, 1], [0]]) == [[], [0], [1], [0]]
+
+def test_transitive_reduction_keeps_reachability():
+    dependencies = random_dependencies(60)
+    reduced = transitive_reduction(dependencies)
+    assert ancestor_bitsets(reduced) == ancestor_bitsets(dependencies)
+    assert sum(map(len, reduced)) <= sum(map(len, dependencies))
+    # No edge of the reduced graph can be removed
+    for i, deps in enumerate(reduced):
+        for dep in deps:
+            others = [[d for d in ds if (j, d) != (i, dep)] for j, ds in enumerate(reduced)]
+            assert ancestor_bitsets(others)[i] >> dep & 1 == 0
+
+def test_closure_engines_agree():
+    dependencies = random_dependencies(60)
+    reference = CLOSURE_ENGINES["floyd-warshall"](dependencies)
+    for engine in ("bitset", "numpy"):
+        assert (CLOSURE_ENGINES[engine](dependencies) == reference).all()
+
+def test_task_system_closure_engine():
+    tasks = [Task(name="T1"), Task(name="T2"), Task(name="T3")]
+    task_system = TaskSystem(tasks, {"T2": ["T1"], "T3": ["T2"]})
+
+    for engine in CLOSURE_ENGINES:
+        closure = task_system.createTransitiveClosureMatrix(engine=engine)
+        assert closure.tolist() == [[0, 1, 1], [0, 0, 1], [0, 0, 0]]
+
+    try:
+        task_system.createTransitiveClosureMatrix(engine="unknown")
+        assert False
+    except ValueError as e:
+        assert str(e).startswith("Unknown closure engine 'unknown'")
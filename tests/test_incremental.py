@@ -0,0 +1,105 @@
+import time
+from src.task_system import TaskSystem
+from src.task import Task
+
+def incremental_task_system(calls, store):
+    # A -> B -> D and C -> D, E is independent
+    def step(name, output, inputs):
+        def run():
+            calls.append(name)
+            store[output] = sum(store[i] for i in inputs) + 1
+        return run
+
+    tasks = [
+        Task(name="A", reads=["In1"], writes=["X"], run=step("A", "X", ["In1"])),
+        Task(name="B", reads=["X"], writes=["Y"], run=step("B", "Y", ["X"])),
+        Task(name="C", reads=["In2"], writes=["Z"], run=step("C", "Z", ["In2"])),
+        Task(name="D", reads=["Y", "Z"], writes=["Out"], run=step("D", "Out", ["Y", "Z"])),
+        Task(name="E", reads=["In3"], writes=["W"], run=step("E", "W", ["In3"])),
+    ]
+    return TaskSystem(tasks, {"B": ["A"], "D": ["B", "C"]})
+
+def test_affected_tasks():
+    task_system = incremental_task_system([], {})
+
+    assert task_system.affectedTasks(["In1"]) == ["A", "B", "D"]
+    assert task_system.affectedTasks(["In2"]) == ["C", "D"]
+    assert task_system.affectedTasks(["In3"]) == ["E"]
+    assert task_system.affectedTasks(["Unknown"]) == []
+
+def test_affected_tasks_overwritten_resource():
+    # B writes X again after A, so B must run again when A does for X to keep its final value
+    tasks = [
+        Task(name="A", reads=["In"], writes=["X"]),
+        Task(name="B", writes=["X"]),
+        Task(name="C", reads=["X"]),
+    ]
+    task_system = TaskSystem(tasks, {"B": ["A"], "C": ["B"]})
+
+    assert task_system.affectedTasks(["In"]) == ["A", "B", "C"]
+
+def test_run_incremental():
+    calls = []
+    store = {"In1": 0, "In2": 0, "In3": 0}
+    with incremental_task_system(calls, store) as task_system:
+        task_system.run()
+        assert sorted(calls) == ["A", "B", "C", "D", "E"]
+        assert store["Out"] == 4
+
+        calls.clear()
+        store["In2"] = 10
+        executed, _ = task_system.run_incremental(["In2"])
+        assert executed == ["C", "D"]
+        assert calls == ["C", "D"]
+        assert store["Out"] == 14
+
+def test_run_only_keeps_order_through_skipped_tasks():
+    # B is not executed but D must still wait for A, which comes before it through B
+    calls = []
+
+    def runA():
+        time.sleep(0.05)
+        calls.append("A")
+
+    tasks = [
+        Task(name="A", writes=["X"], run=runA),
+        Task(name="B", reads=["X"], writes=["Y"], run=lambda: calls.append("B")),
+        Task(name="D", reads=["Y"], writes=["X"], run=lambda: calls.append("D")),
+    ]
+    with TaskSystem(tasks, {"B": ["A"], "D": ["B"]}) as task_system:
+        task_system.run(only=["A", "D"])
+
+    assert calls == ["A", "D"]
+
+def test_run_incremental_overwritten_input():
+    # C overwrites X after B read it, so A must produce X again before B runs again
+    store = {"In": 1}
+
+    def runA():
+        store["X"] = 10
+
+    def runB():
+        store["Y"] = store["X"] + store["In"]
+
+    def runC():
+        store["X"] += 1
+
+    tasks = [
+        Task(name="A", writes=["X"], run=runA),
+        Task(name="B", reads=["X", "In"], writes=["Y"], run=runB),
+        Task(name="C", reads=["X"], writes=["X"], run=runC),
+    ]
+    with TaskSystem(tasks, {"B": ["A"], "C": ["B"]}) as task_system:
+        task_system.run()
+        assert store["Y"] == 11
+
+        store["In"] = 2
+        executed, _ = task_system.run_incremental(["In"])
+        assert executed == ["A", "B", "C"]
+        assert store["Y"] == 12
+        assert store["X"] == 11
+
+    # Without a task producing X, its previous value is lost and every task runs again
+    tasks = [Task(name="B", reads=["X", "In"], writes=["Y"]), Task(name="C", reads=["X"], writes=["X"]), Task(name="D", reads=["In2"])]
+    task_system = TaskSystem(tasks, {"C": ["B"]})
+    assert sorted(task_system.affectedTasks(["In"])) == ["B", "C", "D"]
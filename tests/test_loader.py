@@ -0,0 +1,59 @@
+import functools
+from src.task import Task
+from src.task_system import TaskSystem
+from src.loader import dump_task_system, load_task_system, load_tasks
+
+def square(x):
+    return x * x
+
+def test_loader_roundtrip(tmp_path):
+    tasks = [
+        Task("T1", writes=["X"], run=functools.partial(square, 3), cost=2),
+        Task("T2", reads=["X"], writes=["Y"], run=functools.partial(square, 4)),
+        Task("T3", reads=["Y"]),
+    ]
+    task_system = TaskSystem(tasks, {"T2": ["T1"], "T3": ["T2"]})
+    for path in (tmp_path / "system.jsonl", tmp_path / "system.jsonl.gz"):
+        dump_task_system(task_system, path)
+        loaded = load_task_system(path)
+        assert list(loaded.tasks) == ["T1", "T2", "T3"]
+        assert loaded.precedence == {"T2": ["T1"], "T3": ["T2"]}
+        assert loaded.tasks["T1"].cost == 2
+        loaded.runSeq()
+        assert [task.get_result() for task in loaded.tasks.values()] == [9, 16, "T3"]
+
+def test_loader_interns_names(tmp_path):
+    path = tmp_path / "system.jsonl"
+    path.write_text("".join(f'{{"name": "T{i}", "reads": ["shared"], "deps": ["T{i + 1}"]}}\n' for i in range(3)) + '{"name": "T3"}\n')
+    tasks, precedence = load_tasks(path)
+    # Dependencies on tasks defined further in the file are allowed
+    assert precedence["T0"] == ["T1"]
+    assert all(task.reads[0] is tasks[0].reads[0] for task in tasks[:3])
+
+def test_loader_errors(tmp_path):
+    cases = [
+        ('{"name": "T1"}\n{"name": "T1"}\n', "Line 2: Duplicate task name 'T1'"),
+        ('{"name": "T1"}\n{"name": "T2", "deps": ["T3"]}\n', "Line 2: Missing dependency detected: 'T3' does not exist."),
+        ('{"name": "T1", "reads": "X"}\n', "Line 1: 'reads' must be a list of strings"),
+        ('{"name": ""}\n', "Line 1: Task name cannot be empty"),
+        ('{"name": "T1", "run": "no_module_separator"}\n', "Line 1: Invalid callable reference 'no_module_separator', expected 'module:qualname'"),
+        ('{"name": "T1"}\n{"name": "T2", "run": "no_such_module:f"}\n', "Line 2: No module named 'no_such_module'"),
+        ('{"name": "T1", "run": "src.loader:no_such_function"}\n', "Line 1: module 'src.loader' has no attribute 'no_such_function'"),
+        ('{"name": "T1", "run": ["src.loader:load_tasks"]}\n', "Line 1: 'run' must be a string"),
+    ]
+    for content, message in cases:
+        path = tmp_path / "system.jsonl"
+        path.write_text(content)
+        try:
+            load_tasks(path)
+            assert False
+        except ValueError as e:
+            assert str(e) == message
+
+def test_loader_rejects_local_functions(tmp_path):
+    task_system = TaskSystem([Task("T1", run=lambda: None)])
+    try:
+        dump_task_system(task_system, tmp_path / "system.jsonl")
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,49 @@
+import threading
+import time
+from src.locks import ReadWriteLock
+from src.task_system import TaskSystem
+from src.task import Task
+
+def test_read_write_lock_shared_readers():
+    lock = ReadWriteLock()
+    lock.acquire_read()
+    # A second reader does not wait for the first one
+    acquired = threading.Event()
+    threading.Thread(target=lambda: (lock.acquire_read(), acquired.set())).start()
+    assert acquired.wait(timeout=2)
+    lock.release_read()
+    lock.release_read()
+
+def test_read_write_lock_exclusive_writer():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+
+    def writer():
+        lock.acquire_write()
+        events.append("write")
+        lock.release_write()
+
+    t = threading.Thread(target=writer)
+    t.start()
+    time.sleep(0.05)
+    # The writer waits for the reader to release the lock
+    events.append("read done")
+    lock.release_read()
+    t.join(timeout=2)
+
+    assert events == ["read done", "write"]
+
+def test_run_concurrent_readers():
+    # Both tasks only read F so they must be able to run at the same time,
+    # the barrier is broken if one of them waits for the other
+    barrier = threading.Barrier(2, timeout=2)
+
+    tasks = [
+        Task(name="T1", reads=["A", "F"], writes=["B"], run=barrier.wait),
+        Task(name="T2", reads=["F"], writes=["D"], run=barrier.wait),
+    ]
+    with TaskSystem(tasks, {"T2": ["T1"]}, max_workers=2) as task_system:
+        task_system.run()
+
+    assert not barrier.broken
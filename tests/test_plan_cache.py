@@ -0,0 +1,81 @@
+import os
+from src.task_system import TaskSystem
+from src.task import Task
+from src.plan_cache import system_hash
+
+def cached_task_systems():
+    tasks = [
+        Task(name="T1", writes=["X"]),
+        Task(name="T2", reads=["X"], writes=["Y"], cost=3),
+        Task(name="T3", writes=["Z"]),
+        Task(name="T4", reads=["Y", "Z"]),
+    ]
+    return tasks, {"T2": ["T1"], "T4": ["T2", "T3"]}
+
+def test_plan_cache_roundtrip(tmp_path):
+    tasks, precedence = cached_task_systems()
+    task_system = TaskSystem(tasks, precedence, cache_dir=tmp_path)
+    plan = task_system.compile()
+    assert os.listdir(tmp_path) == [f"{system_hash(task_system)}.npz"]
+
+    # The second system is not analysed again, its plan is read from the file
+    cached_system = TaskSystem(tasks, precedence, cache_dir=tmp_path)
+    cached_plan = cached_system._plan
+    assert cached_plan is not None and cached_plan is not plan
+    assert cached_plan.task_names == plan.task_names
+    assert (cached_plan.dense_matrix() == plan.dense_matrix()).all()
+    assert cached_plan.order == plan.order
+    assert cached_plan.levels == plan.levels
+    assert cached_plan.predecessors == plan.predecessors
+    assert cached_plan.successors == plan.successors
+    assert cached_plan.ranks == plan.ranks
+    cached_system.run()
+
+def test_plan_cache_skips_analysis(tmp_path, monkeypatch):
+    tasks, precedence = cached_task_systems()
+    TaskSystem(tasks, precedence, cache_dir=tmp_path)
+
+    def fail(self):
+        raise AssertionError("The system should not be analysed again")
+
+    monkeypatch.setattr(TaskSystem, "checkDetBernstein", fail)
+    monkeypatch.setattr(TaskSystem, "getConflicts", fail)
+    TaskSystem(tasks, precedence, cache_dir=tmp_path).run()
+
+def test_plan_cache_key_changes(tmp_path):
+    tasks, precedence = cached_task_systems()
+    TaskSystem(tasks, precedence, cache_dir=tmp_path)
+
+    # Changing a r/w domain or the precedence gives a new analysis
+    tasks[2].reads = ["W"]
+    TaskSystem(tasks, precedence, cache_dir=tmp_path)
+    TaskSystem(tasks, {**precedence, "T3": ["T1"]}, cache_dir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 3
+
+def test_plan_cache_checks_missing_tasks(tmp_path):
+    # The precedence of a task that does not exist is not part of the hash, it is checked before the lookup
+    tasks, precedence = cached_task_systems()
+    TaskSystem(tasks, precedence, cache_dir=tmp_path)
+    try:
+        TaskSystem(tasks, {**precedence, "Ghost": ["T1"]}, cache_dir=tmp_path)
+        assert False
+    except ValueError as e:
+        assert str(e) == "Missing task detected: Task 'Ghost' is listed in dependencies but does not exist."
+
+def test_plan_cache_key_chunks(tmp_path):
+    import numpy as np
+    from src.chunked import ChunkedTask, SharedArray
+
+    def add_one(out, A):
+        np.add(A, 1, out=out)
+
+    with SharedArray((4,)) as A, SharedArray((4,)) as B:
+        TaskSystem([ChunkedTask("C", add_one, output=B, inputs=[A], reads=["A"], writes=["B"], nb_chunks=2)], cache_dir=tmp_path)
+
+    # Same names, domains and costs but C[0] and C[1] are not chunks, they conflict
+    tasks = [Task("C[0]", reads=["A"], writes=["B"]), Task("C[1]", reads=["A"], writes=["B"]), Task("C", reads=["A"], writes=["B"], cost=0)]
+    try:
+        TaskSystem(tasks, {"C": ["C[0]", "C[1]"]}, cache_dir=tmp_path)
+        assert False
+    except Exception as e:
+        assert str(e) == "Non-deterministic behavior detected: Tasks 'C[0]' and 'C[1]' are conflicting."
@@ -0,0 +1,62 @@
+import os
+from functools import partial
+from src.task_system import TaskSystem
+from src.task import Task
+
+# Task functions must be defined at module level to be sent to worker processes
+X, Y = 0, 0
+
+def runT1():
+    global X
+    X += 1
+    return os.getpid()
+
+def runT2(factor):
+    global Y
+    Y = X * factor
+    return os.getpid()
+
+def test_run_process_backend():
+    global X, Y
+    X, Y = 1, 0
+    tasks = [
+        Task(name="T1", writes=["X"], run=runT1),
+        Task(name="T2", reads=["X"], writes=["Y"], run=partial(runT2, 10)),
+        Task(name="T3"),
+    ]
+
+    with TaskSystem(tasks, {"T2": ["T1"]}, max_workers=2) as task_system:
+        task_system.run(backend="process")
+
+        # Values written in the worker processes are sent back to the module globals
+        assert X == 2
+        assert Y == 20
+        assert task_system.tasks["T1"].get_result() != os.getpid()
+        # Tasks without a run function do not need a process
+        assert task_system.tasks["T3"].get_result() == "T3"
+
+        # Worker processes are reused by the next executions
+        task_system.run(backend="process")
+        assert X == 3
+        assert Y == 30
+
+def test_run_process_backend_global_vars():
+    # Resources can also come from another dictionary than the module globals
+    store = {"X": 5, "Y": 0}
+    tasks = [
+        Task(name="T1", writes=["X"], run=runT1),
+        Task(name="T2", reads=["X"], writes=["Y"], run=partial(runT2, 2)),
+    ]
+
+    with TaskSystem(tasks, {"T2": ["T1"]}) as task_system:
+        task_system.run(backend="process", global_vars=store)
+
+    assert store == {"X": 6, "Y": 12}
+
+def test_run_unknown_backend():
+    task_system = TaskSystem([Task(name="T1")])
+    try:
+        task_system.run(backend="gpu")
+        assert False
+    except ValueError as e:
+        assert str(e) == "Unknown backend 'gpu', expected 'thread' or 'process'"
@@ -0,0 +1,73 @@
+import numpy as np
+from src.task import Task
+from src.task_system import TaskSystem
+from src.resource_store import ResourceStore
+from src.result_cache import ResultCache
+
+def test_resource_store_versions():
+    store = ResourceStore({"X": 1})
+    version = store.version("X")
+    assert store.version("Y") is None
+
+    store["X"] = 2
+    assert store.version("X") > version
+    assert dict(store) == {"X": 2}
+
+def test_resource_store_snapshot_restore():
+    store = ResourceStore({"X": 1, "Y": 2})
+    versions = {resource: store.version(resource) for resource in store}
+    snapshot = store.snapshot()
+
+    store["X"] = 10
+    store["Z"] = 3
+    del store["Y"]
+    store.restore(snapshot)
+    assert dict(store) == {"X": 1, "Y": 2}
+    assert {resource: store.version(resource) for resource in store} == versions
+
+    # The undo log is only kept while a snapshot is alive
+    store.release(snapshot)
+    store["X"] = 5
+    assert store._log == []
+
+def test_resource_store_arrays_are_read_only_views():
+    array = np.arange(4)
+    store = ResourceStore({"A": array})
+    view = store["A"]
+    assert np.shares_memory(view, array)
+    try:
+        view[0] = 1
+        assert False
+    except ValueError:
+        pass
+    # The array given to the store is not modified
+    assert array.flags.writeable
+
+def test_resource_store_digests():
+    store = ResourceStore({"A": np.arange(4), "B": np.arange(4)})
+    assert store.digest("A") == store.digest("B")
+    store["B"] = np.arange(1, 5)
+    assert store.digest("A") != store.digest("B")
+
+def test_resource_store_with_task_system():
+    store = ResourceStore({"A": np.ones(3), "B": None})
+    calls = []
+
+    def runT1():
+        calls.append("T1")
+        store["B"] = store["A"] * 2
+
+    task_system = TaskSystem([Task("T1", reads=["A"], writes=["B"], run=runT1)])
+    cache = ResultCache()
+    task_system.run(global_vars=store, result_cache=cache)
+    assert (store["B"] == 2).all()
+
+    # Same content under a new version, the result comes from the cache
+    store["A"] = np.ones(3)
+    task_system.run(global_vars=store, result_cache=cache)
+    assert calls == ["T1"] and cache.hits == 1
+
+    # detTestRnd restores the values of the store once done
+    versions = {resource: store.version(resource) for resource in store}
+    assert task_system.detTestRnd(nb_trials=2, global_vars=store, workers=1)
+    assert {resource: store.version(resource) for resource in store} == versions
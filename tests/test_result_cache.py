@@ -0,0 +1,103 @@
+from src.task_system import TaskSystem
+from src.task import Task
+from src.result_cache import ResultCache
+
+def memoized_task_system(calls):
+    def runT1(store):
+        calls.append("T1")
+        store["Y"] = store["X"] * 2
+        return store["Y"]
+
+    def runT2(store):
+        calls.append("T2")
+        store["Z"] = store["Y"] + 1
+        return store["Z"]
+
+    store = {"X": 1, "Y": 0, "Z": 0}
+    tasks = [
+        Task(name="T1", reads=["X"], writes=["Y"], run=lambda: runT1(store)),
+        Task(name="T2", reads=["Y"], writes=["Z"], run=lambda: runT2(store)),
+    ]
+    return TaskSystem(tasks, {"T2": ["T1"]}), store
+
+def test_result_cache_skips_unchanged_tasks():
+    calls = []
+    task_system, store = memoized_task_system(calls)
+    cache = ResultCache()
+
+    task_system.run(global_vars=store, result_cache=cache)
+    assert calls == ["T1", "T2"]
+
+    # Nothing changed, the written values and the results are restored from the cache
+    store.update({"Y": 0, "Z": 0})
+    task_system.runSeq(global_vars=store, result_cache=cache)
+    assert calls == ["T1", "T2"]
+    assert store == {"X": 1, "Y": 2, "Z": 3}
+    assert task_system.tasks["T2"].get_result() == 3
+    assert cache.hits == 2
+
+    # Only the inputs of T1 changed but T2 reads what T1 writes so both run again
+    store["X"] = 5
+    task_system.run(global_vars=store, result_cache=cache)
+    assert calls == ["T1", "T2", "T1", "T2"]
+    assert store == {"X": 5, "Y": 10, "Z": 11}
+
+def test_result_cache_lru_eviction():
+    calls = []
+    task = Task(name="T1", reads=["X"], run=lambda: calls.append(1))
+    cache = ResultCache(max_size=2)
+
+    for x in (1, 2, 1, 3, 2):
+        cache.execute(task, {"X": x})
+
+    # 1 and 2 were cached, 1 is used again, 3 evicts 2 which has to run again
+    assert len(calls) == 4
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 4)
+
+def test_result_cache_unpicklable_values():
+    calls = []
+    task = Task(name="T1", reads=["X"], run=lambda: calls.append(1))
+    cache = ResultCache()
+
+    # Values that can not be fingerprinted are never cached
+    for _ in range(2):
+        cache.execute(task, {"X": lambda: None})
+    assert len(calls) == 2
+
+def test_result_cache_copies_mutable_outputs():
+    # T2 appends to the list written by T1, the cached value of X must not change
+    store = {"A": 1}
+
+    def runT1():
+        store["X"] = [store["A"]]
+
+    def runT2():
+        store["X"].append("x")
+
+    tasks = [
+        Task(name="T1", reads=["A"], writes=["X"], run=runT1),
+        Task(name="T2", reads=["X"], writes=["X"], run=runT2),
+    ]
+    cache = ResultCache()
+    with TaskSystem(tasks, {"T2": ["T1"]}) as task_system:
+        for _ in range(3):
+            task_system.run(global_vars=store, result_cache=cache)
+            assert store["X"] == [1, "x"]
+    assert cache.hits == 4
+
+def test_result_cache_shared_by_systems():
+    # Both systems have a task T1 reading A, their results must not be mixed up
+    store = {"A": 1}
+    cache = ResultCache()
+    systems = [TaskSystem([Task(name="T1", reads=["A"], run=lambda: "system1")]), TaskSystem([Task(name="T1", reads=["A"], run=lambda: "system2")])]
+    for task_system in systems:
+        task_system.run(global_vars=store, result_cache=cache)
+    assert [task_system.tasks["T1"].result for task_system in systems] == ["system1", "system2"]
+    assert cache.hits == 0
+
+    # The same system hits its own entry
+    systems[1].run(global_vars=store, result_cache=cache)
+    assert cache.hits == 1
+    for task_system in systems:
+        task_system.shutdown()
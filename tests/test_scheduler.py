@@ -0,0 +1,140 @@
+import threading
+import time
+from src.task_system import TaskSystem
+from src.task import Task
+
+def test_dataflow_does_not_wait_for_the_whole_level():
+    # T1 is slow, T3 only depends on T2 so it must not wait for T1 to finish
+    finished = []
+    release_t1 = threading.Event()
+
+    def runT1():
+        release_t1.wait(timeout=5)
+        finished.append("T1")
+
+    def runT3():
+        finished.append("T3")
+        release_t1.set()
+
+    tasks = [
+        Task(name="T1", writes=["X"], run=runT1),
+        Task(name="T2", writes=["Y"], run=lambda: finished.append("T2")),
+        Task(name="T3", reads=["Y"], run=runT3),
+    ]
+    task_system = TaskSystem(tasks, {"T3": ["T2"]})
+    task_system.run()
+
+    assert finished == ["T2", "T3", "T1"]
+
+def test_dataflow_respects_max_parallelism_graph():
+    order = []
+    tasks = [Task(name=f"T{i}", reads=[f"R{i - 1}"], writes=[f"R{i}"], run=lambda i=i: order.append(i)) for i in range(50)]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, 50)}
+    TaskSystem(tasks, precedence).run(randomize_names=True)
+
+    assert order == list(range(50))
+
+def test_run_representation():
+    tasks = [
+        Task(name="T1", writes=["X"]),
+        Task(name="T2", writes=["Y"]),
+        Task(name="T3", reads=["X", "Y"], writes=["Z"]),
+    ]
+    task_system = TaskSystem(tasks, {"T3": ["T1", "T2"]})
+    _, representation = task_system.run(repr=True)
+
+    assert representation == "start\n\tparbegin T1 T2 parend;\n\tT3\nend"
+
+def test_run_propagates_task_errors():
+    def fail():
+        raise RuntimeError("Task failed")
+
+    executed = []
+    tasks = [
+        Task(name="T1", writes=["X"], run=fail),
+        Task(name="T2", reads=["X"], run=lambda: executed.append("T2")),
+    ]
+    task_system = TaskSystem(tasks, {"T2": ["T1"]})
+
+    try:
+        task_system.run()
+        assert False
+    except RuntimeError as e:
+        assert str(e) == "Task failed"
+    # Successors of a failed task are never started
+    assert executed == []
+
+def test_run_max_workers():
+    # 20 independent tasks but never more than 3 running at the same time
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def runTask():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+
+    tasks = [Task(name=f"T{i}", run=runTask) for i in range(20)]
+    with TaskSystem(tasks, max_workers=3) as task_system:
+        task_system.run()
+        assert max_running == 3
+
+        # The bound can also be lowered for a single execution
+        max_running = 0
+        task_system.run(max_workers=1)
+        assert max_running == 1
+
+def test_run_reuses_worker_pool():
+    threads = set()
+    tasks = [Task(name=f"T{i}", run=lambda: threads.add(threading.get_ident())) for i in range(10)]
+    task_system = TaskSystem(tasks, max_workers=2)
+
+    for _ in range(5):
+        task_system.run()
+    pool = task_system.getPool()
+    assert len(threads) <= 2
+
+    task_system.shutdown()
+    # Running again after a shutdown creates a new pool
+    task_system.run()
+    assert task_system.getPool() is not pool
+    task_system.shutdown()
+
+def test_run_with_external_pool():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with TaskSystem([Task(name="T1"), Task(name="T2")], pool=pool) as task_system:
+            task_system.run()
+        # The task system does not own the pool so it is still usable
+        assert pool.submit(lambda: 42).result() == 42
+
+def test_plan_ranks():
+    tasks = [
+        Task(name="T1", writes=["X"], cost=2),
+        Task(name="T2", reads=["X"], writes=["Y"], cost=3),
+        Task(name="T3", reads=["X"]),
+    ]
+    plan = TaskSystem(tasks, {"T2": ["T1"], "T3": ["T1"]}).compile()
+
+    # T1 is followed by the longest of T2 (3) and T3 (1 by default)
+    assert plan.ranks == (5, 3, 1)
+
+def test_run_critical_path_first():
+    # With a single worker the long chain must start before the independent short tasks
+    order = []
+    tasks = [
+        Task(name="Short1", run=lambda: order.append("Short1")),
+        Task(name="Short2", run=lambda: order.append("Short2")),
+        Task(name="Head", writes=["X"], run=lambda: order.append("Head")),
+        Task(name="Tail", reads=["X"], run=lambda: order.append("Tail"), cost=5),
+    ]
+    with TaskSystem(tasks, {"Tail": ["Head"]}, max_workers=1) as task_system:
+        task_system.run()
+
+    assert order == ["Head", "Tail", "Short1", "Short2"]
@@ -0,0 +1,11 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+def test_visualization_modules_are_lazy():
+    # matplotlib and networkx are only needed by draw(), numpy by dense matrices, importing the library must not load them
+    code = "import sys, src.task, src.task_system; print(sorted(m for m in ('matplotlib', 'networkx', 'asyncio', 'numpy') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
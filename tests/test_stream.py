@@ -0,0 +1,93 @@
+import time
+from src.task import Task
+from src.task_system import TaskSystem
+
+def pipeline_task_system(log):
+    def parse(store):
+        log.append(("parse", store["input"]))
+        store["parsed"] = store["input"] * 10
+
+    def compute(store):
+        time.sleep(0.01)
+        log.append(("compute", store["input"]))
+        store["output"] = store["parsed"] + 1
+
+    tasks = [
+        Task("parse", reads=["input"], writes=["parsed"], run=parse),
+        Task("compute", reads=["parsed"], writes=["output"], run=compute),
+    ]
+    return TaskSystem(tasks, {"compute": ["parse"]}, max_workers=4)
+
+def test_run_stream_outputs_in_order():
+    log = []
+    with pipeline_task_system(log) as task_system:
+        outputs = [store["output"] for store in task_system.run_stream({"input": x} for x in range(10))]
+    assert outputs == [x * 10 + 1 for x in range(10)]
+
+    # Each task sees the iterations in order
+    for name in ("parse", "compute"):
+        assert [x for task_name, x in log if task_name == name] == list(range(10))
+
+def test_run_stream_overlaps_iterations():
+    log = []
+    with pipeline_task_system(log) as task_system:
+        list(task_system.run_stream(({"input": x} for x in range(5)), window=3))
+    # The next input is parsed before the previous one is computed
+    assert log.index(("parse", 1)) < log.index(("compute", 0))
+
+def test_run_stream_window():
+    read = []
+
+    def inputs():
+        for x in range(6):
+            read.append(x)
+            yield {"input": x}
+
+    with TaskSystem([Task("T", reads=["input"], run=lambda store: None)]) as task_system:
+        for k, store in enumerate(task_system.run_stream(inputs(), window=2)):
+            # Backpressure: at most window inputs are read ahead of the consumer
+            assert store["input"] == k
+            assert len(read) <= k + 2
+    assert read == list(range(6))
+
+def test_run_stream_error():
+    def run(store):
+        if store["input"] == 2:
+            raise ValueError("bad input")
+
+    with TaskSystem([Task("T", reads=["input"], run=run)]) as task_system:
+        outputs = []
+        try:
+            for store in task_system.run_stream({"input": x} for x in range(5)):
+                outputs.append(store["input"])
+            assert False
+        except ValueError as e:
+            assert str(e) == "bad input"
+        assert outputs == [0, 1]
+
+def test_run_stream_subsystems():
+    def double(store):
+        store["output"] = store["input"] * 2
+
+    def subsystem(inline):
+        return TaskSystem([Task("double", reads=["input"], writes=["output"], run=double)], name="sub", inline=inline)
+
+    # The tasks of an inlined subsystem get the store of the iteration
+    with TaskSystem([subsystem(inline=True)]) as task_system:
+        assert [store["output"] for store in task_system.run_stream({"input": x} for x in range(3))] == [0, 2, 4]
+
+    with TaskSystem([subsystem(inline=False)]) as task_system:
+        try:
+            list(task_system.run_stream([{"input": 1}]))
+            assert False
+        except ValueError as e:
+            assert str(e) == "Task system 'sub' can not be streamed as a unit, use inline=True"
+
+def test_run_stream_invalid_window():
+    with pipeline_task_system([]) as task_system:
+        for window in (0, -1):
+            try:
+                list(task_system.run_stream([{"input": 1}], window=window))
+                assert False
+            except ValueError as e:
+                assert str(e) == f"The window must be at least 1, got {window}"
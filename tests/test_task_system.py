@@ -1,3 +1,4 @@
+import time
 from src.task_system import TaskSystem
 from src.task import Task
 
@@ -47,7 +48,7 @@ def test_task_system_check_circular_dependencies():
         TaskSystem(tasks=[task1, task2], precedence=precedence)
         assert False
     except Exception as e:
-        assert str(e) == "Circular dependency detected: Task 'T1' is part of a cycle."
+        assert str(e) == "Circular dependency detected: Task 'T1' is part of a cycle: T1 -> T2 -> T1."
 
 def test_task_system_check_missing_tasks():
     # Test if the TaskSystem raises an error when missing tasks are detected in the dependencies
@@ -129,4 +130,127 @@ def test_task_system_run():
     task_system.run()
     
     assert X == 1
-    assert Y == 2
\ No newline at end of file
+    assert Y == 2
+
+def test_task_system_compile():
+    # Test that the analysis is done once and reused by every execution
+    task1 = Task(name="T1", writes=["X"])
+    task2 = Task(name="T2", reads=["X"], writes=["Y"])
+    task3 = Task(name="T3", writes=["Z"])
+    precedence = {"T2": ["T1"], "T3": ["T1"]}
+    task_system = TaskSystem(tasks=[task1, task2, task3], precedence=precedence)
+
+    plan = task_system.compile()
+    assert task_system.compile() is plan
+    assert plan.order == ("T1", "T2", "T3")
+    # T3 does not conflict with T1 so it can run in the first level
+    assert plan.levels == (("T1", "T3"), ("T2",))
+    assert plan.predecessors[plan.index["T2"]] == (plan.index["T1"],)
+    assert plan.predecessor_counts == (0, 1, 0)
+    assert (task_system.createMatrix() == plan.dense_matrix()).all()
+    assert list(plan.edges()) == [(0, 1)]
+
+    calls = []
+    task_system.getConflicts = lambda: calls.append(1)
+    task_system.run()
+    task_system.runSeq()
+    task_system.parCost(runs=2)
+    assert calls == []
+
+def test_task_system_plan_is_immutable():
+    task_system = TaskSystem(tasks=[Task(name="T1"), Task(name="T2")], precedence={"T2": ["T1"]})
+    plan = task_system.compile()
+
+    try:
+        plan.order = ()
+        assert False
+    except AttributeError:
+        pass
+
+    try:
+        plan.successors[0][0] = 1
+        assert False
+    except TypeError:
+        pass
+
+def test_task_system_check_det_bernstein():
+    # T2 and T3 both write Y without any path between them
+    task1 = Task(name="T1", writes=["X"])
+    task2 = Task(name="T2", reads=["X"], writes=["Y"])
+    task3 = Task(name="T3", writes=["Y"])
+
+    try:
+        TaskSystem(tasks=[task1, task2, task3], precedence={"T2": ["T1"]})
+        assert False
+    except Exception as e:
+        assert str(e) == "Non-deterministic behavior detected: Tasks 'T2' and 'T3' are conflicting."
+
+    # A transitive path is enough to order them
+    TaskSystem(tasks=[task1, task2, task3], precedence={"T2": ["T1"], "T3": ["T2"]})
+
+def test_task_system_check_det_bernstein_large_pipeline():
+    # Each task reads the output of the previous one, validation only looks at tasks sharing a resource
+    n = 20000
+    tasks = [Task(name=f"T{i}", reads=[f"R{i - 1}"] if i else [], writes=[f"R{i}"]) for i in range(n)]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, n)}
+
+    start = time.time()
+    TaskSystem(tasks, precedence)
+    assert time.time() - start < 10
+
+def test_task_system_sparse_plan():
+    # A chain of 100k tasks would need a 10^10 cells matrix, the plan only stores its n - 1 edges
+    n = 100000
+    tasks = [Task(name=f"T{i}", reads=[f"R{i - 1}"] if i else [], writes=[f"R{i}"]) for i in range(n)]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, n)}
+
+    start = time.time()
+    plan = TaskSystem(tasks, precedence).compile()
+    assert time.time() - start < 20
+    assert len(plan.levels) == n
+    assert sum(plan.predecessor_counts) == n - 1
+
+def test_task_system_reduced_plan():
+    # Every task writes X so every pair conflicts, only the edges of the chain are kept
+    n = 50
+    tasks = [Task(name=f"T{i}", writes=["X"]) for i in range(n)]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, n)}
+    task_system = TaskSystem(tasks, precedence)
+
+    plan = task_system.compile()
+    assert list(plan.edges()) == [(i, i + 1) for i in range(n - 1)]
+    assert len(plan.levels) == n
+    # createMatrix still has every ordered conflicting pair
+    assert task_system.createMatrix().sum() == n * (n - 1) // 2
+    task_system.run()
+
+def test_task_system_check_circular_dependencies_path():
+    # The whole cycle is reported, even when it goes through many tasks
+    n = 5000
+    tasks = [Task(name=f"T{i}") for i in range(n)]
+    precedence = {f"T{i}": [f"T{(i - 1) % n}"] for i in range(n)}
+    try:
+        TaskSystem(tasks, precedence)
+        assert False
+    except Exception as e:
+        path = " -> ".join(f"T{i}" for i in range(n))
+        assert str(e) == f"Circular dependency detected: Task 'T0' is part of a cycle: {path} -> T0."
+
+def test_task_system_missing_dependencies_checked_first():
+    try:
+        TaskSystem([Task(name="T1")], {"T1": ["T1", "T2"]})
+        assert False
+    except ValueError as e:
+        assert str(e) == "Missing dependency detected: Task 'T1' depends on 'T2' which does not exist."
+
+def test_task_system_million_tasks_chain():
+    # Tasks are given in reverse order so a depth-first search would go through the whole chain
+    n = 1000000
+    tasks = [Task(name=f"T{i}") for i in reversed(range(n))]
+    precedence = {f"T{i}": [f"T{i - 1}"] for i in range(1, n)}
+
+    start = time.time()
+    task_system = TaskSystem(tasks, precedence)
+    executed, _ = task_system.runSeq()
+    assert time.time() - start < 60
+    assert executed[:3] == ["T0", "T1", "T2"] and executed[-1] == f"T{n - 1}"
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import time
+from src.task_system import TaskSystem
+from src.task import Task
+from src.tracing import Tracer
+
+def failing_task():
+    raise RuntimeError("Task failed")
+
+def tracing_task_system():
+    tasks = [
+        Task(name="T1", writes=["X"], run=lambda: time.sleep(0.02)),
+        Task(name="T2", reads=["X"], writes=["Y"], run=lambda: time.sleep(0.01)),
+        Task(name="T3", writes=["Z"], run=lambda: time.sleep(0.01)),
+    ]
+    return TaskSystem(tasks, {"T2": ["T1"]})
+
+def test_tracer_records_tasks():
+    tracer = Tracer()
+    with tracing_task_system() as task_system:
+        task_system.run(tracer=tracer)
+
+    assert set(tracer.records) == {"T1", "T2", "T3"}
+    t1, t2 = tracer.records["T1"], tracer.records["T2"]
+    # T2 becomes ready when T1 is done
+    assert t1.ready <= t1.start < t1.end <= t2.ready <= t2.start < t2.end
+    assert t1.duration >= 0.02
+    assert t1.thread is not None
+    # Conflicting tasks are ordered by the graph so no lock is contended
+    assert t2.lock_waits == {}
+    assert tracer.records["T3"].error is None
+
+def test_tracer_chrome_trace(tmp_path):
+    tracer = Tracer()
+    with tracing_task_system() as task_system:
+        task_system.run(tracer=tracer)
+
+    path = tmp_path / "trace.json"
+    tracer.to_chrome_trace(path)
+    with open(path) as f:
+        trace = json.load(f)
+
+    task_events = [event for event in trace["traceEvents"] if event["cat"] == "task"]
+    assert sorted(event["name"] for event in task_events) == ["T1", "T2", "T3"]
+    assert all(event["ph"] == "X" and event["dur"] > 0 for event in task_events)
+
+def test_tracer_summary_and_errors():
+    tracer = Tracer()
+    tasks = [Task(name="T1", writes=["X"], run=failing_task), Task(name="T2", reads=["X"])]
+    with TaskSystem(tasks, {"T2": ["T1"]}) as task_system:
+        try:
+            task_system.run(tracer=tracer)
+            assert False
+        except RuntimeError:
+            pass
+
+    summary = tracer.summary()
+    assert "error: RuntimeError('Task failed')" in summary
+    assert "not run" not in summary
+    assert "T2" not in summary
+    assert summary.splitlines()[-1].startswith("Makespan:")
+
+def test_tracer_run_async():
+    async def io_task():
+        await asyncio.sleep(0.01)
+
+    tracer = Tracer()
+    task_system = TaskSystem([Task(name="T1", run=io_task), Task(name="T2", run=io_task)])
+    asyncio.run(task_system.run_async(tracer=tracer))
+
+    # Both tasks ran at the same time on the event loop thread
+    assert tracer.parallelism() > 1.5
+    assert tracer.records["T1"].thread == tracer.records["T2"].thread